@@ -0,0 +1,153 @@
+import sys
+import time
+import threading
+
+
+class AdaptiveInterval:
+    """Sampling period that snaps to minimum on activity and backs off geometrically while nothing changes"""
+
+    def __init__(self, minimum=0.25, maximum=2.0, factor=1.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def reset(self):
+        self.current = self.minimum
+        return self.current
+
+    def next(self):
+        """Period to wait now; the one after it is longer, up to maximum"""
+        period = self.current
+        self.current = min(self.maximum, self.current * self.factor)
+        return period
+
+
+class IdleSource:
+    """Tells how long the user has gone without touching keyboard or mouse"""
+
+    def idle_seconds(self):
+        raise NotImplementedError
+
+
+class Win32IdleSource(IdleSource):
+    """GetLastInputInfo, session-wide input idle time"""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.info = LASTINPUTINFO()
+        self.info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        self.byref = ctypes.byref
+
+    def idle_seconds(self):
+        if not self.user32.GetLastInputInfo(self.byref(self.info)):
+            return 0.0
+        # Both are 32-bit millisecond tick counts; the mask handles wraparound after 49.7 days
+        return ((self.kernel32.GetTickCount() - self.info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+
+class SimulatedIdleSource(IdleSource):
+    """Input idle time driven by touch() calls, for running and testing off Windows"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.last_input = clock()
+
+    def touch(self, at=None):
+        """Record user input at time at (default now)"""
+        self.last_input = self.clock() if at is None else at
+
+    def idle_seconds(self):
+        return max(0.0, self.clock() - self.last_input)
+
+
+def make_default_idle_source():
+    """Real input idle time on Windows; None elsewhere, where there is nothing to ask"""
+    if sys.platform != "win32":
+        return None
+    return Win32IdleSource()
+
+
+class IdleWatcher(threading.Thread):
+    """Pauses accounting while the user is away and resumes it when input returns.
+
+    Once idle time passes threshold, on_idle(since) is called with the
+    moment input stopped, so the minutes spent waiting to notice aren't
+    billed; on_active(at) gets the moment input came back. While the user
+    is active the watcher sleeps until idle time could first reach the
+    threshold (threshold minus current idle), which is normally minutes,
+    not a fixed tick. While idle it backs off from min_poll to max_poll;
+    that only delays noticing the return, because at is read from the
+    idle source. check() runs the same test immediately, e.g. when a
+    window switch suggests the user is back.
+    """
+
+    def __init__(self, source, threshold, on_idle, on_active, min_poll=1.0, max_poll=10.0, clock=time.time):
+        super().__init__(daemon=True)
+        self.source = source
+        self.threshold = threshold
+        self.on_idle = on_idle
+        self.on_active = on_active
+        self.clock = clock
+        self.idle_poll = AdaptiveInterval(min_poll, max_poll, 2.0)
+        self.min_poll = min_poll
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.idle = False
+        self.idle_since = None
+
+        self.wakeups = 0
+        self.idle_periods = 0
+        self.idle_excluded = 0.0
+
+    def check(self):
+        """Sample the idle source once and switch state if needed; returns the seconds to wait next"""
+        with self.lock:
+            idle_seconds = self.source.idle_seconds()
+            now = self.clock()
+            if not self.idle and idle_seconds >= self.threshold:
+                self.idle = True
+                self.idle_since = now - idle_seconds
+                self.idle_periods += 1
+                self.idle_poll.reset()
+                self.on_idle(self.idle_since)
+            elif self.idle and idle_seconds < self.threshold:
+                self.idle = False
+                returned = max(now - idle_seconds, self.idle_since)
+                self.idle_excluded += returned - self.idle_since
+                self.on_active(returned)
+
+            if self.idle:
+                return self.idle_poll.next()
+            return max(self.min_poll, self.threshold - idle_seconds)
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wakeups += 1
+            try:
+                wait = self.check()
+            except Exception as e:
+                print(f"Idle check failed: {e}")
+                wait = self.threshold
+            self.stopped.wait(wait)
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+
+    def stats(self):
+        return {
+            'idle': self.idle,
+            'threshold': self.threshold,
+            'wakeups': self.wakeups,
+            'idle_periods': self.idle_periods,
+            'idle_excluded_s': self.idle_excluded
+        }
@@ -0,0 +1,174 @@
+import customtkinter
+
+ALL_CATEGORIES = "All categories"
+CREATE_NEW = "Create New..."
+
+
+class AppRow:
+    """One recycled row: icon, app name and category selector"""
+
+    def __init__(self, parent, height, on_change):
+        self.app_name = None
+        self.on_change = on_change
+        self.frame = customtkinter.CTkFrame(parent, height=height)
+        self.frame.pack_propagate(False)
+
+        self.icon_label = customtkinter.CTkLabel(self.frame, text="", width=32)
+        self.icon_label.pack(side="left", padx=5)
+        self.name_label = customtkinter.CTkLabel(self.frame, text="", width=180, anchor="w")
+        self.name_label.pack(side="left", padx=5)
+
+        self.category_var = customtkinter.StringVar()
+        self.dropdown = customtkinter.CTkOptionMenu(
+            self.frame,
+            values=[CREATE_NEW],
+            variable=self.category_var,
+            command=lambda val: self.app_name and self.on_change(self.app_name, val),
+            width=150
+        )
+        self.dropdown.pack(side="left", padx=5)
+
+    def bind(self, record, icon, categories):
+        """Show record in this row without creating any widgets"""
+        self.app_name = record.name
+        self.name_label.configure(text=record.name)
+        self.icon_label.configure(image=icon)
+        self.dropdown.configure(values=categories)
+        self.category_var.set(record.category)
+
+
+class VirtualAppList(customtkinter.CTkFrame):
+    """Scrollable application list that only instantiates the rows in view.
+
+    A fixed pool of AppRow widgets is placed over the viewport and rebound to
+    different apps as the list scrolls, so the widget count depends on the
+    window height rather than on how many executables have been tracked.
+    Search and category filters narrow the list without touching widgets.
+    """
+
+    def __init__(self, parent, registry, get_categories, icon_for, on_category_change, row_height=44):
+        super().__init__(parent)
+        self.registry = registry
+        self.get_categories = get_categories
+        self.icon_for = icon_for
+        self.on_category_change = on_category_change
+        self.row_height = row_height
+        self.items = []
+        self.first = 0
+        self.rows = []
+        self.version = None
+        self.category_values = [CREATE_NEW]
+
+        # Search and filter bar
+        filter_frame = customtkinter.CTkFrame(self)
+        filter_frame.pack(fill="x", pady=(0, 5))
+        self.search_var = customtkinter.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.refresh())
+        customtkinter.CTkEntry(filter_frame, textvariable=self.search_var,
+                               placeholder_text="Search applications").pack(side="left", padx=5, pady=5,
+                                                                              fill="x", expand=True)
+        self.filter_var = customtkinter.StringVar(value=ALL_CATEGORIES)
+        self.filter_menu = customtkinter.CTkOptionMenu(filter_frame, values=[ALL_CATEGORIES],
+                                                       variable=self.filter_var,
+                                                       command=lambda _: self.refresh(), width=150)
+        self.filter_menu.pack(side="left", padx=5, pady=5)
+
+        # Viewport with a fixed pool of rows plus its own scrollbar
+        body = customtkinter.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        self.scrollbar = customtkinter.CTkScrollbar(body, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport = customtkinter.CTkFrame(body, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self.resize(e.height))
+        self.bind_wheel(self.viewport)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_wheel)
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def resize(self, height):
+        """Grow the row pool to cover the viewport; rows are never destroyed"""
+        needed = max(1, height // self.row_height + 1)
+        while len(self.rows) < needed:
+            row = AppRow(self.viewport, self.row_height - 4, self.on_category_change)
+            self.bind_wheel(row.frame)
+            self.rows.append(row)
+        self.render()
+
+    def visible_count(self):
+        return max(1, self.viewport.winfo_height() // self.row_height)
+
+    def refresh(self):
+        """Re-apply search and filter, e.g. after apps were added or recategorized"""
+        self.version = self.registry.version
+        categories = sorted(self.get_categories())
+        self.category_values = categories + [CREATE_NEW]
+        self.filter_menu.configure(values=[ALL_CATEGORIES] + categories)
+
+        search = self.search_var.get().strip().lower()
+        category = self.filter_var.get()
+        self.items = sorted(
+            (record.name for record in self.registry
+             if (not search or search in record.name.lower()) and
+             (category == ALL_CATEGORIES or record.category == category)),
+            key=str.lower)
+        self.first = min(self.first, max(0, len(self.items) - self.visible_count()))
+        self.render()
+
+    def refresh_if_changed(self):
+        if self.version != self.registry.version:
+            self.refresh()
+
+    def update_row(self, app_name, recategorized=False):
+        """Apply an edit to one app in place if its row is on screen.
+
+        recategorized says the edit itself bumped the registry version once;
+        any other change since the last refresh, e.g. a newly tracked app,
+        means the list has to be filtered again.
+        """
+        version = self.registry.version
+        expected = self.version + 1 if recategorized else self.version
+        if self.filter_var.get() != ALL_CATEGORIES or version != expected:
+            # The edit may move the app in or out of the filtered list, or
+            # apps were added that the list hasn't picked up yet
+            self.refresh()
+            return
+        for row in self.rows:
+            if row.app_name == app_name:
+                record = self.registry.get(app_name)
+                if record is not None:
+                    row.bind(record, self.icon_for(record), self.category_values)
+        self.version = version
+
+    def render(self):
+        """Bind the pooled rows to the slice of items currently in view"""
+        for i, row in enumerate(self.rows):
+            index = self.first + i
+            if index < len(self.items):
+                record = self.registry.get(self.items[index])
+                row.bind(record, self.icon_for(record), self.category_values)
+                row.frame.place(x=0, y=i * self.row_height, relwidth=1.0)
+            else:
+                row.app_name = None
+                row.frame.place_forget()
+
+        total = max(1, len(self.items))
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_count()) / total))
+
+    def scroll_to(self, first):
+        first = max(0, min(int(first), len(self.items) - self.visible_count()))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def on_wheel(self, event):
+        self.scroll_to(self.first - event.delta // 120)
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_count() if args[2] == "pages" else 1)
+            self.scroll_to(self.first + step)
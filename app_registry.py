@@ -0,0 +1,94 @@
+import sys
+
+
+class AppRecord:
+    """Tracked totals and metadata for one executable"""
+    __slots__ = ('app_id', 'name', 'total_time', 'category', 'exe_path', 'icon_path')
+
+    def __init__(self, app_id, name, total_time=0.0, category='Uncategorized', exe_path=None, icon_path=None):
+        self.app_id = app_id
+        self.name = name
+        self.total_time = total_time
+        self.category = sys.intern(category)
+        self.exe_path = exe_path
+        self.icon_path = icon_path
+
+    def to_json(self):
+        return {
+            'total_time': self.total_time,
+            'category': self.category,
+            'exe_path': self.exe_path,
+            'icon_path': self.icon_path
+        }
+
+
+class AppRegistry:
+    """Explicit registry of AppRecords with stable integer ids.
+
+    Unlike the old defaultdict, looking up an unknown name never creates a
+    record; callers that mean to start tracking an app use ensure().
+    version increases whenever an app is added or recategorized, so views
+    can tell a structural change from a plain time update.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.by_id = []
+        self.version = 0
+
+    def get(self, name):
+        return self.records.get(name)
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __iter__(self):
+        # by_id only ever grows, so this is safe while the monitor adds apps
+        return iter(self.by_id)
+
+    def __len__(self):
+        return len(self.records)
+
+    def items(self):
+        return self.records.items()
+
+    def ensure(self, name):
+        """Return the record for name, creating it if this app is new"""
+        record = self.records.get(name)
+        if record is None:
+            record = AppRecord(len(self.by_id), name)
+            self.records[name] = record
+            self.by_id.append(record)
+            self.version += 1
+        return record
+
+    def category_of(self, name, default='Uncategorized'):
+        record = self.records.get(name)
+        return record.category if record is not None else default
+
+    def set_category(self, name, category):
+        self.records[name].category = sys.intern(category)
+        self.version += 1
+
+    def rename_category(self, old_name, new_name):
+        """Move every app in old_name to new_name"""
+        new_name = sys.intern(new_name)
+        for record in self.by_id:
+            if record.category == old_name:
+                record.category = new_name
+        self.version += 1
+
+    def to_json(self):
+        """Records in the app_usage.json 'app_data' layout"""
+        return {record.name: record.to_json() for record in self.by_id}
+
+    def load_json(self, data):
+        for name, info in data.items():
+            record = self.ensure(name)
+            record.total_time = info.get('total_time', 0.0)
+            record.category = sys.intern(info.get('category') or 'Uncategorized')
+            record.exe_path = info.get('exe_path')
+            record.icon_path = info.get('icon_path')
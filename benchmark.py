@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+from datetime import date, datetime, timedelta
+from collections import defaultdict
+
+from exporters import iter_hourly_rows, write_columnar
+from journal import UsageJournal
+from persistence import atomic_write_json
+from probes import FocusEvent, ReplayProbe
+from realtime_view import RealtimeView
+from tracker import Tracker
+
+FIRST_DAY = date(2025, 1, 1)
+CATEGORIES = ["Browsing", "Development", "System", "Communication", "Uncategorized"]
+
+
+def usage_files(path):
+    """Hourly files holding the recorded app mix, and where they came from.
+
+    The first run of the tracker moves hourly_usage.json into monthly
+    partitions under hourly/ and keeps the old file as .bak, so those are
+    looked at too; ([], None) if there is no recorded usage at all.
+    """
+    directory = path if os.path.isdir(path) else os.path.join(os.path.dirname(path), "hourly")
+    if os.path.isfile(path):
+        return [path], path
+    if os.path.exists(os.path.join(directory, "manifest.json")):
+        files = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.endswith(".json") and name != "manifest.json")
+        return files, directory
+    if os.path.isfile(path + ".bak"):
+        return [path + ".bak"], path + ".bak"
+    return [], None
+
+
+def app_weights(path="hourly_usage.json", count=20):
+    """Relative weights for count apps, shaped like the recorded usage, and the source they came from.
+
+    Apps seen in the usage files keep their share of the recorded time; any
+    extra apps continue the long tail with geometrically smaller weights.
+    Without recorded usage every app is synthetic and the source is
+    "synthetic", so results from different workloads are never compared
+    unknowingly.
+    """
+    totals = defaultdict(float)
+    files, source = usage_files(path)
+    for file_path in files:
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        for date_str, hours in data.items():
+            if date_str.startswith('_'):
+                continue
+            for apps in hours.values():
+                for app_name, seconds in apps.items():
+                    totals[app_name] += seconds
+
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+    weights = dict(ranked)
+    smallest = ranked[-1][1] if ranked else 1.0
+    for i in range(count - len(weights)):
+        weights[f"app{i:04d}.exe"] = smallest * 0.9 ** (i + 1)
+    return weights, source or "synthetic"
+
+
+def switch_stream(weights, days, switches_per_hour, seed=0, first_day=FIRST_DAY, work_hours=(9, 18)):
+    """Deterministic (app, start, end) intervals covering the working hours of each day"""
+    rng = random.Random(seed)
+    names = sorted(weights)
+    cumulative = []
+    total = 0.0
+    for name in names:
+        total += weights[name]
+        cumulative.append(total)
+
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        t = datetime(day.year, day.month, day.day, work_hours[0]).timestamp()
+        day_end = datetime(day.year, day.month, day.day, work_hours[1]).timestamp()
+        last = None
+        while t < day_end:
+            app_name = rng.choices(names, cum_weights=cumulative)[0]
+            if app_name == last and len(names) > 1:
+                continue
+            dwell = min(rng.expovariate(switches_per_hour / 3600.0), day_end - t)
+            yield app_name, t, t + dwell
+            last = app_name
+            t += dwell
+
+
+class NullTextbox:
+    """Stands in for the CTkTextbox RealtimeView draws into"""
+
+    def __init__(self):
+        self.lines = 0
+
+    def configure(self, **kwargs):
+        pass
+
+    def delete(self, start, end):
+        pass
+
+    def insert(self, index, text, tag=None):
+        self.lines += text.count("\n")
+
+    def yview(self):
+        return 0.0, 1.0
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+def format_time(seconds):
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d}"
+
+
+class WorkdayReplay(ReplayProbe):
+    """Replays (app, start, end) intervals into a Tracker, pausing accounting between working days.
+
+    The gap between one day's last interval and the next day's first is
+    handled the way the idle watcher would, through pause_accounting and
+    resume_accounting, so nights aren't billed to the last app.
+    """
+
+    def __init__(self, tracker, intervals):
+        super().__init__(())
+        self.tracker = tracker
+        self.intervals = intervals
+        self.index = 0
+
+    def next_event(self):
+        if self.closed.is_set():
+            return None
+        if self.index >= len(self.intervals):
+            if self.intervals and not self.tracker.idle:
+                # Bill the last interval up to its end
+                self.tracker.pause_accounting(self.intervals[-1][2])
+            return None
+        app_name, start, _ = self.intervals[self.index]
+        if self.index:
+            previous_end = self.intervals[self.index - 1][2]
+            if start > previous_end:
+                self.tracker.pause_accounting(previous_end)
+                self.tracker.resume_accounting(start)
+        self.index += 1
+        return FocusEvent(start, 0, 0, None, app_name)
+
+
+def quietly(fn):
+    """fn without the tracker's per-switch console output"""
+    def run():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return fn()
+    return run
+
+
+class Benchmark:
+    """Runs the tracker's tracking, save, load, report and refresh paths on synthetic data.
+
+    Switches are replayed through tracker.Tracker itself in a scratch
+    directory, without Tk, Win32 or the query server, so every step runs
+    the same code as the daemon and the App. Each step records wall time,
+    operation count and, unless disabled, the tracemalloc peak while it ran.
+    """
+
+    def __init__(self, workdir, days=90, apps=20, switches_per_hour=30, seed=0,
+                 memory=True, usage_path="hourly_usage.json"):
+        self.workdir = workdir
+        self.days = days
+        self.apps = apps
+        self.switches_per_hour = switches_per_hour
+        self.seed = seed
+        self.memory = memory
+        self.usage_path = usage_path
+        self.workload = None
+        self.results = {}
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def measure(self, name, fn, ops=None):
+        """Time fn(); ops may be a number or a callable of fn's result"""
+        if self.memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        peak = None
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        count = ops(result) if callable(ops) else ops
+        self.results[name] = {
+            'seconds': elapsed,
+            'ops': count,
+            'us_per_op': elapsed * 1e6 / count if count else None,
+            'peak_bytes': peak
+        }
+        print(f"{name.ljust(24)} {elapsed * 1000:10.2f} ms" +
+              (f"  {elapsed * 1e6 / count:9.2f} us/op" if count else "") +
+              (f"  peak {peak / 1024:9.0f} KB" if peak is not None else ""))
+        return result
+
+    def run(self):
+        weights, self.workload = app_weights(self.usage_path, self.apps)
+        print(f"App mix from {self.workload}")
+        rng = random.Random(self.seed)
+        categories = {name: rng.choice(CATEGORIES) for name in sorted(weights)}
+
+        intervals = self.measure('generate', lambda: list(switch_stream(
+            weights, self.days, self.switches_per_hour, self.seed, FIRST_DAY)), len)
+
+        cwd = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            self.run_tracker(intervals, categories)
+        finally:
+            os.chdir(cwd)
+        self.daemon_cold_start()
+        return self.results
+
+    def run_tracker(self, intervals, categories):
+        """The in-process steps; the tracker's files live in the current directory"""
+        # Tracking: every switch goes through Tracker.handle_focus_event on the monitor thread
+        tracker = Tracker()
+        for name, category in sorted(categories.items()):
+            tracker.app_data.ensure(name)
+            tracker.add_category(category)
+            tracker.assign_category(name, category)
+
+        def track():
+            tracker.start(WorkdayReplay(tracker, intervals), ipc=False)
+            tracker.monitor_thread.join()
+        self.measure('track_switches', quietly(track), len(intervals))
+
+        # Saving: one writer flush of everything the replay changed
+        def save():
+            tracker.save_data()
+            tracker.save_hourly_data()
+            tracker.writer.flush()
+            return tracker.writer.last_error
+        error = self.measure('save_all', save, 1)
+        if error:
+            raise RuntimeError(f"Saving failed: {error}")
+        quietly(tracker.stop)()
+
+        journal = UsageJournal("bench_journal.jsonl")
+        recent = intervals[-5000:]
+        self.measure('journal_append', lambda: [journal.append(*interval) for interval in recent], len(recent))
+        journal.close()
+        self.measure('journal_replay', lambda: sum(1 for _ in UsageJournal("bench_journal.jsonl").replay()),
+                     len(recent))
+
+        # Loading: what the daemon and the App do before tracking starts
+        tracker = self.measure('load_tracker', quietly(Tracker), 1)
+        try:
+            self.reports(tracker, intervals[-1][0] if intervals else None)
+        finally:
+            quietly(tracker.stop)()
+
+    def reports(self, tracker, current):
+        """Report queries, Real-time tab refreshes and the columnar export on a loaded tracker"""
+        engine = tracker.query_engine
+        first = FIRST_DAY
+        last = first + timedelta(days=self.days - 1)
+        week_start = last - timedelta(days=last.weekday())
+        reports = [
+            ('report_daily', last, last, 'app'),
+            ('report_weekly', week_start, week_start + timedelta(days=6), 'app'),
+            ('report_month', last.replace(day=1), last, 'category'),
+            ('report_all_apps', first, last, 'app'),
+            ('report_hour_profile', first, last, 'hour'),
+            ('report_weekday_category', first, last, ['weekday', 'category']),
+        ]
+        for name, start, end, group_by in reports:
+            self.measure(name, lambda: engine.query(start, end, group_by, top_n=50), 1)
+
+        # Real-time tab refresh
+        registry = tracker.app_data
+        view = RealtimeView(NullTextbox(), format_time)
+        self.measure('update_gui_full', lambda: view.refresh(registry, current, 0.0, ()), 1)
+
+        def incremental():
+            for second in range(1, 1001):
+                view.refresh(registry, current, float(second), ())
+        self.measure('update_gui_incremental', incremental, 1000)
+
+        # Export
+        self.measure('export_columnar', lambda: write_columnar(
+            iter_hourly_rows(tracker.hourly_log, registry.category_of, first, last), "export.atc"),
+            lambda rows: rows)
+
+    def daemon_cold_start(self):
+        """Start tracker.py in a fresh interpreter on the saved data and record its startup stats"""
+        open(self.path("no_events.jsonl"), "w").close()
+        stats_path = self.path("startup.json")
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tracker.py"),
+                        "--data-dir", self.workdir, "--replay", self.path("no_events.jsonl"),
+                        "--startup-stats", stats_path, "--no-ipc"], check=True, stdout=subprocess.DEVNULL)
+        with open(stats_path, "r") as f:
+            stats = json.load(f)
+        self.results['daemon_cold_start'] = {
+            'seconds': stats['seconds'],
+            'ops': 1,
+            'us_per_op': stats['seconds'] * 1e6,
+            'peak_bytes': None,
+            'rss_bytes': stats['rss_bytes']
+        }
+        print(f"{'daemon_cold_start'.ljust(24)} {stats['seconds'] * 1000:10.2f} ms"
+              f"  rss {stats['rss_bytes'] / 1024:9.0f} KB")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline, report):
+    """Print how each step's time moved relative to a baseline results file"""
+    if baseline.get('params') != report['params']:
+        # tracemalloc alone slows most steps several times over
+        print(f"\nWarning: baseline ran with {baseline.get('params')}, not {report['params']}")
+    print(f"\n{'step'.ljust(24)} {'baseline ms':>12} {'now ms':>12} {'ratio':>7}")
+    for name, result in report['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        flag = "  slower" if ratio > 1.2 else ""
+        print(f"{name.ljust(24)} {before['seconds'] * 1000:12.2f} {result['seconds'] * 1000:12.2f} {ratio:7.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tracker's hot paths on a synthetic workload")
+    parser.add_argument("--days", type=int, default=90, help="days of history to generate")
+    parser.add_argument("--apps", type=int, default=20, help="number of distinct apps")
+    parser.add_argument("--switches-per-hour", type=float, default=30, help="mean window switches per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--usage", default="hourly_usage.json", help="hourly log whose app mix to imitate")
+    parser.add_argument("--out", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc for undistorted timings")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="apptracker-bench-")
+    try:
+        bench = Benchmark(workdir, args.days, args.apps, args.switches_per_hour, args.seed,
+                          memory=not args.no_memory, usage_path=args.usage)
+        results = bench.run()
+    finally:
+        if args.keep:
+            print(f"Scratch data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': {
+            'days': args.days,
+            'apps': args.apps,
+            'switches_per_hour': args.switches_per_hour,
+            'seed': args.seed,
+            'memory': not args.no_memory,
+            'workload': bench.workload
+        },
+        'results': results
+    }
+    atomic_write_json(args.out, report, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+from datetime import date, timedelta
+
+# UTC offsets only change on quarter-hour boundaries, so one lookup per block is exact
+OFFSET_BLOCK = 900
+EPOCH_DATE = date(1970, 1, 1)
+
+
+class LocalClock:
+    """Converts epoch seconds to local (date, hour) with cached UTC offsets and date strings"""
+
+    def __init__(self):
+        self.offsets = {}
+        self.date_strs = {}
+
+    def offset(self, t):
+        """Local UTC offset in seconds at epoch time t"""
+        block = int(t // OFFSET_BLOCK)
+        offset = self.offsets.get(block)
+        if offset is None:
+            offset = self.offsets[block] = time.localtime(block * OFFSET_BLOCK).tm_gmtoff
+        return offset
+
+    def date_str(self, day_number):
+        """"YYYY-MM-DD" for a count of local days since 1970-01-01"""
+        date_str = self.date_strs.get(day_number)
+        if date_str is None:
+            date_str = self.date_strs[day_number] = (EPOCH_DATE + timedelta(days=day_number)).isoformat()
+        return date_str
+
+    def split(self, start, end):
+        """Yield (date_str, hour, seconds) for each local clock hour [start, end) touches.
+
+        Seconds are real elapsed time, so a fall-back hour collects both of
+        its passes and a spring-forward gap collects nothing.
+        """
+        t = start
+        while t < end:
+            offset = self.offset(t)
+            local_hour = int((t + offset) // 3600)
+            segment_end = min(end, local_hour * 3600 + 3600 - offset)
+
+            # Stop early if the offset changes (a DST transition) inside this hour
+            block_start = (int(t // OFFSET_BLOCK) + 1) * OFFSET_BLOCK
+            while block_start < segment_end:
+                if self.offset(block_start) != offset:
+                    segment_end = block_start
+                    break
+                block_start += OFFSET_BLOCK
+
+            day_number, hour = divmod(local_hour, 24)
+            yield self.date_str(day_number), hour, segment_end - t
+            t = segment_end
+
+    def bucket(self, intervals):
+        """Aggregate (app, start, end) intervals into {(date_str, hour, app): seconds}"""
+        buckets = {}
+        for app_name, start, end in intervals:
+            for date_str, hour, seconds in self.split(start, end):
+                key = (date_str, hour, app_name)
+                buckets[key] = buckets.get(key, 0.0) + seconds
+        return buckets
+
+
+LOCAL_CLOCK = LocalClock()
+
+
+def split_interval(start, end, clock=LOCAL_CLOCK):
+    """(date_str, hour, seconds) segments of one interval in epoch seconds"""
+    return clock.split(start, end)
+
+
+def bucket_intervals(intervals, clock=LOCAL_CLOCK):
+    """Batch form of split_interval for (app, start, end) intervals"""
+    return clock.bucket(intervals)
@@ -0,0 +1,148 @@
+import matplotlib.pyplot as plt
+from matplotlib.transforms import Bbox
+
+BAR_WIDTH = 0.8
+
+
+class HourlyChart:
+    """Today's stacked hour-by-category bars, drawn once and then blitted.
+
+    The 24 rectangles per category are created only when the set of
+    categories or the day changes. Every other update moves existing
+    rectangles with set_y/set_height and blits just the hour columns that
+    changed over backgrounds cached at the last full draw. Full redraws
+    (new category, y axis growth, legend totals) go through draw_idle so
+    they never block the Tk loop.
+    """
+
+    def __init__(self, figure, ax, canvas):
+        self.figure = figure
+        self.ax = ax
+        self.canvas = canvas
+        self.colors = plt.cm.tab20.colors
+        self.categories = []
+        self.bars = {}
+        self.date_str = None
+        self.ymax = 1.0
+        self.backgrounds = None
+        self.legend = None
+
+        self.full_draws = 0
+        self.blits = 0
+
+        self.setup_axes()
+        self.empty_text = ax.text(0.5, 0.5, 'No data today', transform=ax.transAxes,
+                                  ha='center', va='center', color='white', fontsize=12)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def setup_axes(self):
+        ax = self.ax
+        ax.set_xlabel('Hour of Day', color='white')
+        ax.set_ylabel('Total Time (hours)', color='white')
+        ax.set_xticks(range(0, 24))
+        ax.set_xticklabels([f"{h:02d}:00" for h in range(24)], rotation=45, color='white')
+        ax.tick_params(axis='y', colors='white')
+        ax.set_xlim(-0.5, 23.5)  # Full day range
+        ax.set_ylim(0, self.ymax)
+
+    def column_bbox(self, hour):
+        """Display-space box covering one hour's stack"""
+        x0, _ = self.ax.transData.transform((hour - 0.5, 0))
+        x1, _ = self.ax.transData.transform((hour + 0.5, 0))
+        return Bbox.from_extents(x0, self.ax.bbox.y0, x1, self.ax.bbox.y1)
+
+    def on_draw(self, event):
+        """After a full draw, cache each column's background and draw the bars over it"""
+        self.backgrounds = [self.canvas.copy_from_bbox(self.column_bbox(hour)) for hour in range(24)]
+        for rects in self.bars.values():
+            for rect in rects:
+                self.ax.draw_artist(rect)
+        self.canvas.blit(self.ax.bbox)
+        self.full_draws += 1
+
+    def update(self, hours, date_str):
+        """Show hours (24 dicts of category -> seconds) for date_str"""
+        hours = hours or [{}] * 24
+        categories = sorted({category for buckets in hours for category in buckets})
+        values = {category: [hours[hour].get(category, 0) / 3600 for hour in range(24)]
+                  for category in categories}
+
+        if categories != self.categories or date_str != self.date_str:
+            self.rebuild(categories, date_str)
+
+        # Move the existing rectangles, noting which hour columns changed
+        changed = set()
+        tops = [0.0] * 24
+        for category in categories:
+            for hour, rect in enumerate(self.bars[category]):
+                height = values[category][hour]
+                if rect.get_y() != tops[hour] or rect.get_height() != height:
+                    rect.set_y(tops[hour])
+                    rect.set_height(height)
+                    changed.add(hour)
+                tops[hour] += height
+
+        full = self.backgrounds is None
+        if max(tops) > self.ymax:
+            self.ymax = max(1.0, max(tops) * 1.2)
+            self.ax.set_ylim(0, self.ymax)
+            full = True
+
+        if self.legend is not None:
+            for text, category in zip(self.legend.get_texts(), categories):
+                label = f"{category} ({sum(values[category]):.1f}h)"
+                if text.get_text() != label:
+                    text.set_text(label)
+                    full = True
+
+        if full:
+            self.canvas.draw_idle()
+            return
+
+        for hour in sorted(changed):
+            self.canvas.restore_region(self.backgrounds[hour])
+            for category in categories:
+                self.ax.draw_artist(self.bars[category][hour])
+            self.canvas.blit(self.column_bbox(hour))
+            self.blits += 1
+
+    def stats(self):
+        return {'full_draws': self.full_draws, 'blits': self.blits, 'categories': len(self.categories)}
+
+    def rebuild(self, categories, date_str):
+        """Recreate the bar artists for a new set of categories or a new day"""
+        for rects in self.bars.values():
+            for rect in rects:
+                rect.remove()
+        if self.legend is not None:
+            self.legend.remove()
+            self.legend = None
+
+        self.bars = {}
+        for i, category in enumerate(categories):
+            container = self.ax.bar(range(24), [0] * 24, BAR_WIDTH, bottom=[0] * 24,
+                                    label=category, color=self.colors[i % len(self.colors)],
+                                    animated=True)
+            self.bars[category] = list(container.patches)
+
+        self.categories = categories
+        if date_str != self.date_str:
+            self.ymax = 1.0
+            self.ax.set_ylim(0, self.ymax)
+        self.date_str = date_str
+        self.ax.set_title(f"Today's App Usage by Category ({date_str})", color='white')
+        self.empty_text.set_visible(not categories)
+
+        if categories:
+            self.legend = self.ax.legend(
+                handles=[self.bars[category][0] for category in categories],
+                labels=list(categories),
+                loc='upper right',
+                facecolor='#2b2b2b',
+                labelcolor='white',
+                fontsize=8
+            )
+            # Legend proxies copy the bars' animated flag; they belong in the full draw
+            for handle in getattr(self.legend, 'legend_handles', None) or self.legend.legendHandles:
+                handle.set_animated(False)
+        self.backgrounds = None
@@ -0,0 +1,218 @@
+import io
+import csv
+import sys
+import zlib
+import struct
+import threading
+from array import array
+from datetime import date, timedelta
+
+COLUMNS = ("date", "hour", "app", "category", "seconds")
+COLUMNAR_MAGIC = b"APPTRK-COLS-1\n"
+BLOCK_HEADER = struct.Struct("<III")  # rows, new app names, new category names
+BLOCK_PREFIX = struct.Struct("<I")    # compressed block length
+
+
+def iter_hourly_rows(store, category_of, start, end, lock=None):
+    """Yield (date, hour, app, category, seconds) for every non-empty bucket, day by day.
+
+    Only one day is materialized at a time, and only while holding lock, so
+    the monitor thread is never blocked for the whole export. Partition
+    files are read before the lock is taken, where the store supports it.
+    """
+    day = start
+    while day <= end:
+        date_str = day.isoformat()
+        if lock is not None:
+            if hasattr(store, 'preload'):
+                store.preload(date_str[:7], lock)
+            with lock:
+                rows = [(date_str, hour, app, category_of(app), seconds)
+                        for hour, app, seconds in store.iter_day(date_str)]
+        else:
+            rows = [(date_str, hour, app, category_of(app), seconds)
+                    for hour, app, seconds in store.iter_day(date_str)]
+        rows.sort()
+        yield from rows
+        day += timedelta(days=1)
+
+
+def write_csv(rows, path, progress=None, chunk_rows=1000):
+    """Stream rows to a CSV file in chunks; returns the number of rows written"""
+    count = 0
+    chunk = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                writer.writerows(chunk)
+                count += len(chunk)
+                chunk = []
+                if progress:
+                    progress(count, row[0])
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def _little_endian(arr):
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+class ColumnarWriter:
+    """Compressed column-oriented dump of hourly rows.
+
+    The file is COLUMNAR_MAGIC followed by zlib-compressed blocks of up to
+    block_rows rows. Each block stores the app and category names first seen
+    in it, then its columns as little-endian arrays: day ordinal (uint32),
+    hour (uint8), app id (uint32), category id (uint16) and seconds (double).
+    App and category ids index dictionaries that grow block by block, so
+    each name is written once per file.
+    """
+
+    def __init__(self, f, block_rows=65536, level=6):
+        self.f = f
+        self.block_rows = block_rows
+        self.level = level
+        self.apps = {}
+        self.categories = {}
+        self.rows = 0
+        self.last_date = (None, 0)
+        self.reset()
+        f.write(COLUMNAR_MAGIC)
+
+    def reset(self):
+        self.new_apps = []
+        self.new_categories = []
+        self.days = array('I')
+        self.hours = array('B')
+        self.app_ids = array('I')
+        self.category_ids = array('H')
+        self.seconds = array('d')
+
+    def encode(self, name, ids, new_names):
+        code = ids.get(name)
+        if code is None:
+            code = ids[name] = len(ids)
+            new_names.append(name)
+        return code
+
+    def write(self, row):
+        date_str, hour, app, category, seconds = row
+        if date_str != self.last_date[0]:
+            # Rows arrive grouped by day
+            self.last_date = (date_str, date.fromisoformat(date_str).toordinal())
+        self.days.append(self.last_date[1])
+        self.hours.append(hour)
+        self.app_ids.append(self.encode(app, self.apps, self.new_apps))
+        self.category_ids.append(self.encode(category, self.categories, self.new_categories))
+        self.seconds.append(seconds)
+        if len(self.seconds) >= self.block_rows:
+            self.flush_block()
+
+    def flush_block(self):
+        if not self.seconds:
+            return
+        block = io.BytesIO()
+        block.write(BLOCK_HEADER.pack(len(self.seconds), len(self.new_apps), len(self.new_categories)))
+        for name in self.new_apps + self.new_categories:
+            encoded = name.encode("utf-8")
+            block.write(BLOCK_PREFIX.pack(len(encoded)))
+            block.write(encoded)
+        for column in (self.days, self.hours, self.app_ids, self.category_ids, self.seconds):
+            block.write(_little_endian(column))
+        compressed = zlib.compress(block.getvalue(), self.level)
+        self.f.write(BLOCK_PREFIX.pack(len(compressed)))
+        self.f.write(compressed)
+        self.rows += len(self.seconds)
+        self.reset()
+
+    def close(self):
+        self.flush_block()
+
+
+def write_columnar(rows, path, progress=None, block_rows=65536):
+    """Stream rows into a ColumnarWriter file; returns the number of rows written"""
+    with open(path, "wb") as f:
+        writer = ColumnarWriter(f, block_rows)
+        for count, row in enumerate(rows, 1):
+            writer.write(row)
+            if progress and count % 1000 == 0:
+                progress(count, row[0])
+        writer.close()
+    return writer.rows
+
+
+def read_columnar(path):
+    """Yield the (date, hour, app, category, seconds) rows of a columnar dump"""
+    apps, categories = [], []
+    with open(path, "rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar export")
+        while True:
+            prefix = f.read(BLOCK_PREFIX.size)
+            if not prefix:
+                break
+            data = memoryview(zlib.decompress(f.read(BLOCK_PREFIX.unpack(prefix)[0])))
+            rows, new_apps, new_categories = BLOCK_HEADER.unpack_from(data)
+            offset = BLOCK_HEADER.size
+            for names, count in ((apps, new_apps), (categories, new_categories)):
+                for _ in range(count):
+                    length = BLOCK_PREFIX.unpack_from(data, offset)[0]
+                    offset += BLOCK_PREFIX.size
+                    names.append(bytes(data[offset:offset + length]).decode("utf-8"))
+                    offset += length
+
+            columns = []
+            for typecode in ('I', 'B', 'I', 'H', 'd'):
+                column = array(typecode)
+                size = rows * column.itemsize
+                column.frombytes(data[offset:offset + size])
+                if sys.byteorder != "little":
+                    column.byteswap()
+                columns.append(column)
+                offset += size
+
+            days, hours, app_ids, category_ids, seconds = columns
+            for i in range(rows):
+                yield (date.fromordinal(days[i]).isoformat(), hours[i], apps[app_ids[i]],
+                       categories[category_ids[i]], seconds[i])
+
+
+class ExportJob(threading.Thread):
+    """Runs one export on a background thread.
+
+    on_progress(fraction, rows) and on_done(rows, error) are called from the
+    export thread; callers hop back to Tk with after().
+    """
+
+    WRITERS = {'csv': write_csv, 'columnar': write_columnar}
+
+    def __init__(self, rows, path, fmt, start, end, on_progress=None, on_done=None):
+        super().__init__(daemon=True)
+        self.rows = rows
+        self.path = path
+        self.write = self.WRITERS[fmt]
+        self.start_ordinal = start.toordinal()
+        self.days = (end - start).days + 1
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+    def progress(self, count, date_str):
+        if self.on_progress:
+            done = date.fromisoformat(date_str).toordinal() - self.start_ordinal
+            self.on_progress(min(1.0, done / self.days), count)
+
+    def run(self):
+        count, error = 0, None
+        try:
+            count = self.write(self.rows, self.path, self.progress)
+        except Exception as e:
+            print(f"Export to {self.path} failed: {e}")
+            error = e
+        if self.on_done:
+            self.on_done(count, error)
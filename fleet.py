@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from persistence import atomic_write_json
+
+STATE_VERSION = 1
+CHUNK_CHARS = 1 << 20
+MICROS = 1000000
+
+
+class _JsonStream:
+    """Decodes one JSON value at a time from a file read in chunks"""
+
+    def __init__(self, f, chunk_chars=CHUNK_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next chunk, dropping what has been consumed; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_chars)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in {self.f.name}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number can stop at the chunk boundary and still parse
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_members(path, chunk_chars=CHUNK_CHARS):
+    """Yield (key, value) for each member of the top-level JSON object in path.
+
+    Only one member, e.g. one day of an hourly log, is decoded at a time, so
+    memory stays flat however large the file is.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_chars)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            yield key, stream.value()
+            if stream.peek() == ",":
+                stream.pos += 1
+                continue
+            stream.expect("}")
+            return
+
+
+class UsageCounters:
+    """Additive usage counters in integer microseconds.
+
+    days holds the total per date and cells the per-hour totals per month
+    and app. Integer addition is exact, so merging any set of counters in
+    any order gives identical results; that is what makes the fleet rollups
+    independent of input order and lets a file's contribution be swapped
+    out when it changes.
+    """
+
+    def __init__(self):
+        self.days = {}   # date -> micros
+        self.cells = {}  # month -> app -> [micros per hour]
+
+    def add(self, date_str, hour, app_name, micros):
+        self.days[date_str] = self.days.get(date_str, 0) + micros
+        apps = self.cells.setdefault(date_str[:7], {})
+        hours = apps.get(app_name)
+        if hours is None:
+            hours = apps[app_name] = [0] * 24
+        hours[hour] += micros
+
+    def merge(self, other):
+        for date_str, micros in other.days.items():
+            self.days[date_str] = self.days.get(date_str, 0) + micros
+        for month, apps in other.cells.items():
+            mine = self.cells.setdefault(month, {})
+            for app_name, hours in apps.items():
+                total = mine.get(app_name)
+                if total is None:
+                    mine[app_name] = list(hours)
+                else:
+                    for hour, micros in enumerate(hours):
+                        total[hour] += micros
+        return self
+
+    def to_json(self):
+        return {'days': self.days, 'cells': self.cells}
+
+    @classmethod
+    def from_json(cls, data):
+        counters = cls()
+        counters.days = data['days']
+        counters.cells = data['cells']
+        return counters
+
+
+def parse_hourly_file(path):
+    """UsageCounters for one hourly_usage.json or monthly partition file, as JSON"""
+    counters = UsageCounters()
+    for date_str, hours in iter_members(path):
+        if date_str.startswith('_'):
+            continue
+        for hour_str, apps in hours.items():
+            hour = int(hour_str.split(':')[0])
+            for app_name, seconds in apps.items():
+                counters.add(date_str, hour, app_name, round(seconds * MICROS))
+    return counters.to_json()
+
+
+def host_files(host_dir):
+    """Hourly files of one workstation: its monthly partitions, else its single-file log"""
+    partitions = os.path.join(host_dir, "hourly")
+    if os.path.isdir(partitions):
+        return sorted(os.path.join(partitions, name) for name in os.listdir(partitions)
+                      if name.endswith(".json") and name != "manifest.json")
+    single = os.path.join(host_dir, "hourly_usage.json")
+    return [single] if os.path.exists(single) else []
+
+
+def load_categories(host_dir):
+    """App -> category from a workstation's app_usage.json"""
+    path = os.path.join(host_dir, "app_usage.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: info.get('category') or 'Uncategorized'
+            for name, info in data.get('app_data', {}).items() if isinstance(info, dict)}
+
+
+def fingerprint(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def seconds(micros):
+    return micros / MICROS
+
+
+class FleetMerge:
+    """Merges the hourly logs of many workstations into fleet-wide rollups.
+
+    Each host is a directory holding a copy of a workstation's data files
+    and is tagged by the directory name. Hourly files are parsed in a
+    process pool into per-file UsageCounters, which are kept in the state
+    file together with each file's size and mtime; a later run only parses
+    files that are new or changed, drops files that disappeared, and
+    re-reduces everything from the stored counters. Categories come from
+    each host's own app_usage.json, so two hosts may file the same app
+    differently.
+    """
+
+    def __init__(self, state_path="fleet_state.json", resume=True):
+        self.state_path = state_path
+        self.files = {}       # path -> {'host', 'fingerprint', 'counters'}
+        self.categories = {}  # host -> {app: category}
+        self.parsed = 0
+        self.reused = 0
+        if resume and state_path and os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                self.files = state['files']
+
+    def update(self, host_dirs, workers=None):
+        """Bring the per-file counters in line with what is on disk now"""
+        hosts = {}
+        for host_dir in host_dirs:
+            host = os.path.basename(os.path.normpath(host_dir))
+            if host in hosts:
+                raise ValueError(f"Two host directories are named {host}: {hosts[host]} and {host_dir}")
+            hosts[host] = host_dir
+
+        current = {}
+        for host, host_dir in sorted(hosts.items()):
+            self.categories[host] = load_categories(host_dir)
+            for path in host_files(host_dir):
+                current[os.path.abspath(path)] = host
+
+        files = {}
+        stale = []
+        for path, host in sorted(current.items()):
+            entry = self.files.get(path)
+            if entry is not None and entry['host'] == host and entry['fingerprint'] == fingerprint(path):
+                files[path] = entry
+            else:
+                stale.append(path)
+
+        if stale:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for path, counters in zip(stale, pool.map(parse_hourly_file, stale, chunksize=4)):
+                    files[path] = {'host': current[path], 'fingerprint': fingerprint(path), 'counters': counters}
+
+        self.parsed = len(stale)
+        self.reused = len(files) - len(stale)
+        self.files = files
+
+    def save_state(self):
+        if self.state_path:
+            atomic_write_json(self.state_path, {'version': STATE_VERSION, 'files': self.files})
+
+    def rollups(self):
+        """Fleet totals in seconds by app, category, hour of day, host, month and date"""
+        apps, categories, hosts, months, days = {}, {}, {}, {}, {}
+        hours = [0] * 24
+        app_hours, category_hours = {}, {}
+
+        # Files reduce to one set of counters per host, since categories are per host
+        per_host = {}
+        for path in sorted(self.files):
+            entry = self.files[path]
+            per_host.setdefault(entry['host'], UsageCounters()).merge(UsageCounters.from_json(entry['counters']))
+
+        for host, counters in sorted(per_host.items()):
+            category_of = self.categories.get(host, {})
+            for date_str, micros in counters.days.items():
+                days[date_str] = days.get(date_str, 0) + micros
+                hosts[host] = hosts.get(host, 0) + micros
+            for month, month_apps in counters.cells.items():
+                for app_name, per_hour in month_apps.items():
+                    category = category_of.get(app_name, 'Uncategorized')
+                    total = sum(per_hour)
+                    apps[app_name] = apps.get(app_name, 0) + total
+                    categories[category] = categories.get(category, 0) + total
+                    months[month] = months.get(month, 0) + total
+                    app_row = app_hours.setdefault(app_name, [0] * 24)
+                    category_row = category_hours.setdefault(category, [0] * 24)
+                    for hour, micros in enumerate(per_hour):
+                        if micros:
+                            hours[hour] += micros
+                            app_row[hour] += micros
+                            category_row[hour] += micros
+
+        def by_time(totals):
+            return {key: seconds(micros) for key, micros in sorted(totals.items(), key=lambda item: (-item[1], item[0]))}
+
+        return {
+            'hosts': len(hosts),
+            'files': len(self.files),
+            'apps': by_time(apps),
+            'categories': by_time(categories),
+            'hours': [seconds(micros) for micros in hours],
+            'app_hours': {app_name: [seconds(micros) for micros in app_hours[app_name]] for app_name in sorted(app_hours)},
+            'category_hours': {category: [seconds(micros) for micros in category_hours[category]]
+                               for category in sorted(category_hours)},
+            'host_totals': {host: seconds(hosts[host]) for host in sorted(hosts)},
+            'months': {month: seconds(months[month]) for month in sorted(months)},
+            'days': {date_str: seconds(days[date_str]) for date_str in sorted(days)}
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the hourly usage logs of many workstations")
+    parser.add_argument("hosts", nargs="*", help="one directory per workstation, named after it")
+    parser.add_argument("--hosts-root", help="directory whose subdirectories are all workstations")
+    parser.add_argument("--out", default="fleet_rollups.json", help="where to write the merged rollups")
+    parser.add_argument("--state", default="fleet_state.json", help="per-file counters kept between runs")
+    parser.add_argument("--full", action="store_true", help="ignore the saved state and parse everything")
+    parser.add_argument("--workers", type=int, help="parser processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    host_dirs = list(args.hosts)
+    if args.hosts_root:
+        host_dirs += [entry.path for entry in sorted(os.scandir(args.hosts_root), key=lambda e: e.name)
+                      if entry.is_dir()]
+    if not host_dirs:
+        parser.error("no host directories given")
+
+    started = time.perf_counter()
+    merge = FleetMerge(args.state, resume=not args.full)
+    merge.update(host_dirs, args.workers)
+    merge.save_state()
+    rollups = merge.rollups()
+    atomic_write_json(args.out, rollups, indent=2)
+    print(f"Merged {rollups['hosts']} hosts: parsed {merge.parsed} files, reused {merge.reused}, "
+          f"in {time.perf_counter() - started:.2f} s; rollups written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import os
+import json
+from array import array
+from collections import OrderedDict
+
+from persistence import atomic_write_json
+
+ZERO_HOURS = array('d', [0.0] * 24)
+
+
+class DayBlock:
+    """One day of usage: a dense 24 x n block for the n apps seen that day.
+
+    cols holds the interned app id of each column and values is column-major,
+    so an app's 24 hours are contiguous and can be summed as one slice.
+    """
+    __slots__ = ('cols', 'values')
+
+    def __init__(self):
+        self.cols = array('i')
+        self.values = array('d')
+
+    def column(self, app_id, create=False):
+        try:
+            return self.cols.index(app_id)
+        except ValueError:
+            if not create:
+                return -1
+            self.cols.append(app_id)
+            self.values.extend(ZERO_HOURS)
+            return len(self.cols) - 1
+
+    def app_total(self, col):
+        return sum(self.values[col * 24:(col + 1) * 24])
+
+    def hour_totals(self):
+        """Total seconds per hour across every app"""
+        totals = [0.0] * 24
+        values = self.values
+        for col in range(len(self.cols)):
+            base = col * 24
+            for hour in range(24):
+                totals[hour] += values[base + hour]
+        return totals
+
+
+class HourlyStore:
+    """Compact replacement for the date -> "HH:00" -> app -> seconds dicts.
+
+    App names are interned to integer ids shared across all days and each day
+    is a DayBlock of doubles, instead of three levels of dicts and boxed floats.
+    """
+
+    def __init__(self):
+        self.app_ids = {}
+        self.app_names = []
+        self.days = {}
+
+    def intern(self, app_name):
+        app_id = self.app_ids.get(app_name)
+        if app_id is None:
+            app_id = len(self.app_names)
+            self.app_ids[app_name] = app_id
+            self.app_names.append(app_name)
+        return app_id
+
+    def add(self, date_str, hour, app_name, seconds):
+        """Add seconds to one (date, hour, app) bucket"""
+        block = self.days.get(date_str)
+        if block is None:
+            block = self.days[date_str] = DayBlock()
+        col = block.column(self.intern(app_name), create=True)
+        block.values[col * 24 + hour] += seconds
+
+    def get(self, date_str, hour, app_name):
+        block = self.days.get(date_str)
+        app_id = self.app_ids.get(app_name)
+        if block is None or app_id is None:
+            return 0.0
+        col = block.column(app_id)
+        return block.values[col * 24 + hour] if col >= 0 else 0.0
+
+    def __contains__(self, date_str):
+        return date_str in self.days
+
+    def dates(self):
+        return sorted(self.days)
+
+    def iter_day(self, date_str):
+        """Yield (hour, app_name, seconds) for every non-empty bucket of a day"""
+        block = self.days.get(date_str)
+        if block is None:
+            return
+        names = self.app_names
+        values = block.values
+        for col, app_id in enumerate(block.cols):
+            base = col * 24
+            for hour in range(24):
+                seconds = values[base + hour]
+                if seconds:
+                    yield hour, names[app_id], seconds
+
+    def day_totals(self, date_str):
+        """Seconds per app for one day"""
+        block = self.days.get(date_str)
+        if block is None:
+            return {}
+        return {self.app_names[app_id]: block.app_total(col) for col, app_id in enumerate(block.cols)}
+
+    def range_totals(self, date_strs):
+        """Seconds per app summed over several days"""
+        totals = array('d', [0.0] * len(self.app_names))
+        for date_str in date_strs:
+            block = self.days.get(date_str)
+            if block is None:
+                continue
+            for col, app_id in enumerate(block.cols):
+                totals[app_id] += block.app_total(col)
+        return {self.app_names[app_id]: t for app_id, t in enumerate(totals) if t}
+
+    def hour_totals(self, date_str):
+        """Seconds per hour of day across all apps"""
+        block = self.days.get(date_str)
+        return block.hour_totals() if block is not None else [0.0] * 24
+
+    def to_json(self):
+        """Nested dicts in the hourly_usage.json layout"""
+        data = {}
+        for date_str in self.dates():
+            hours = {}
+            for hour, app_name, seconds in self.iter_day(date_str):
+                hours.setdefault(f"{hour:02d}:00", {})[app_name] = seconds
+            data[date_str] = dict(sorted(hours.items()))
+        return data
+
+    def load_json(self, data):
+        """Merge the hourly_usage.json layout into the store"""
+        for date_str, hours in data.items():
+            for hour_str, apps in hours.items():
+                hour = int(hour_str.split(':')[0])
+                for app_name, seconds in apps.items():
+                    self.add(date_str, hour, app_name, seconds)
+
+
+class PartitionedHourlyStore:
+    """HourlyStore split into one JSON file per month, loaded on demand.
+
+    hourly/manifest.json lists the dates in every partition, so dates() and
+    startup never read old months. A partition is loaded the first time a
+    day in it is touched and up to max_resident partitions stay in memory;
+    the least recently used clean one is dropped beyond that. Partitions in
+    a snapshot stay resident until write() is done with them, so a failed
+    write can put them back in dirty. Each partition
+    file carries the journal sequence it was saved at, and snapshot() only
+    includes partitions changed since the last save.
+    """
+
+    def __init__(self, directory="hourly", max_resident=3):
+        self.directory = directory
+        self.max_resident = max_resident
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.resident = OrderedDict()  # month -> HourlyStore
+        self.seqs = {}                 # month -> journal seq of the partition file
+        self.partition_dates = {}      # month -> set of dates
+        self.dirty = set()
+        self.pinned = set()            # months in a snapshot not yet written
+        self.saved_seq = 0             # journal seq of the last complete save
+        self.loads = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            self.saved_seq = manifest.get('_journal_seq', 0)
+            for month, info in manifest.get('partitions', {}).items():
+                self.partition_dates[month] = set(info.get('dates', []))
+                self.seqs[month] = info.get('journal_seq', 0)
+        # A crash between writing a new month and the manifest leaves a partition it doesn't list
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".json") and name != "manifest.json" and name[:-5] not in self.partition_dates:
+                self.partition(name[:-5])
+
+    def partition_path(self, month):
+        return os.path.join(self.directory, f"{month}.json")
+
+    def partition(self, month, create=False):
+        """Resident HourlyStore for a month, loading it from disk if needed"""
+        store = self.resident.get(month)
+        if store is not None:
+            self.resident.move_to_end(month)
+            return store
+
+        path = self.partition_path(month)
+        if os.path.exists(path):
+            seq, store = self.read_partition(path)
+            self.seqs[month] = seq
+            self.loads += 1
+        elif create:
+            store = HourlyStore()
+        else:
+            return None
+        return self.make_resident(month, store)
+
+    def read_partition(self, path):
+        """(journal seq, HourlyStore) from one partition file"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        seq = data.pop('_journal_seq', 0)
+        store = HourlyStore()
+        store.load_json(data)
+        return seq, store
+
+    def make_resident(self, month, store):
+        self.resident[month] = store
+        self.partition_dates.setdefault(month, set()).update(store.days)
+        self.evict()
+        return store
+
+    def preload(self, month, lock):
+        """Load a month's partition without holding lock while the file is parsed.
+
+        For readers such as long report queries that shouldn't block the
+        monitor thread. If the partition was saved again in the meantime
+        the copy read here is dropped and partition() loads it as usual.
+        """
+        path = self.partition_path(month)
+        with lock:
+            if month in self.resident or not os.path.exists(path):
+                return
+        seq, store = self.read_partition(path)
+        with lock:
+            if month not in self.resident and seq == self.seqs.get(month, 0):
+                self.loads += 1
+                self.make_resident(month, store)
+
+    def evict(self):
+        """Drop least recently used partitions that have nothing unsaved"""
+        # The most recent one is about to be used, so it always stays
+        for month in list(self.resident)[:-1]:
+            if len(self.resident) <= self.max_resident:
+                break
+            if month not in self.dirty and month not in self.pinned:
+                del self.resident[month]
+                self.evictions += 1
+
+    def journal_seq(self, date_str):
+        """Journal sequence already included in the partition holding date_str"""
+        month = date_str[:7]
+        self.partition(month)
+        return self.seqs.get(month, 0)
+
+    def add(self, date_str, hour, app_name, seconds):
+        month = date_str[:7]
+        self.partition(month, create=True).add(date_str, hour, app_name, seconds)
+        self.partition_dates[month].add(date_str)
+        self.dirty.add(month)
+
+    def get(self, date_str, hour, app_name):
+        store = self.partition(date_str[:7])
+        return store.get(date_str, hour, app_name) if store is not None else 0.0
+
+    def __contains__(self, date_str):
+        return date_str in self.partition_dates.get(date_str[:7], ())
+
+    def dates(self):
+        return sorted(date_str for dates in self.partition_dates.values() for date_str in dates)
+
+    def iter_day(self, date_str):
+        store = self.partition(date_str[:7])
+        if store is not None:
+            yield from store.iter_day(date_str)
+
+    def day_totals(self, date_str):
+        store = self.partition(date_str[:7])
+        return store.day_totals(date_str) if store is not None else {}
+
+    def range_totals(self, date_strs):
+        totals = {}
+        for date_str in date_strs:
+            for app_name, seconds in self.day_totals(date_str).items():
+                totals[app_name] = totals.get(app_name, 0.0) + seconds
+        return totals
+
+    def hour_totals(self, date_str):
+        store = self.partition(date_str[:7])
+        return store.hour_totals(date_str) if store is not None else [0.0] * 24
+
+    def snapshot(self, journal_seq):
+        """Changed partitions plus the manifest, ready for write(); call with the data lock held"""
+        partitions = {}
+        for month in sorted(self.dirty):
+            data = {'_journal_seq': journal_seq}
+            data.update(self.resident[month].to_json())
+            partitions[month] = data
+            self.seqs[month] = journal_seq
+        self.pinned.update(self.dirty)
+        self.dirty = set()
+        self.evict()
+        manifest = {
+            '_journal_seq': journal_seq,
+            'partitions': {month: {'dates': sorted(dates), 'journal_seq': self.seqs.get(month, 0)}
+                           for month, dates in sorted(self.partition_dates.items())}
+        }
+        return partitions, manifest
+
+    def write(self, snapshot):
+        """Write a snapshot's partitions, then the manifest; returns bytes written"""
+        partitions, manifest = snapshot
+        written = 0
+        try:
+            for month, data in partitions.items():
+                written += atomic_write_json(self.partition_path(month), data)
+        except Exception:
+            # Still unsaved; the next flush writes them again
+            self.dirty.update(partitions)
+            raise
+        finally:
+            # Evictable again from the next partition() call
+            self.pinned.difference_update(partitions)
+        return written + atomic_write_json(self.manifest_path, manifest)
+
+    def load_json(self, data, journal_seq=0):
+        """Import the single-file hourly_usage.json layout, e.g. when migrating"""
+        for date_str, hours in data.items():
+            store = self.partition(date_str[:7], create=True)
+            store.load_json({date_str: hours})
+            self.partition_dates[date_str[:7]].add(date_str)
+            self.seqs[date_str[:7]] = journal_seq
+            self.dirty.add(date_str[:7])
+        self.saved_seq = journal_seq
+
+    def stats(self):
+        return {
+            'partitions': len(self.partition_dates),
+            'resident': list(self.resident),
+            'dirty': sorted(self.dirty),
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
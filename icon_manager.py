@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import OrderedDict
+
+from icon_store import IconStore, ICON_SIZE
+
+
+class IconManager:
+    """In-memory icon cache shared by the monitor and the UI.
+
+    Icon pixels live in a packed IconStore; the manager holds decoded 32x32
+    images and their CTkImage wrappers in an LRU keyed by exe hash, so
+    rebuilding rows never goes back to the store. Icon paths recorded on
+    apps ("icon_cache/<key>.png") only name the key. Any PNGs left from the
+    old one-file-per-icon cache are imported on first start. prewarm()
+    decodes known icons on a background thread at startup.
+    """
+
+    def __init__(self, cache_dir, max_items=256):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.lock = threading.Lock()
+        self.images = OrderedDict()   # key -> PIL image
+        self.ctk_images = {}          # key -> CTkImage wrapping images[key]
+        self.hits = 0
+        self.misses = 0
+
+        self.store = IconStore(cache_dir)
+        migrated = self.store.migrate_directory()
+        if migrated:
+            print(f"Moved {migrated} cached icons into {self.store.pack_path}")
+
+    @staticmethod
+    def key_for(icon_path):
+        """Exe hash an icon path was saved under"""
+        return os.path.splitext(os.path.basename(icon_path.replace("\\", "/")))[0]
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def exists(self, key):
+        return key in self.store
+
+    def put(self, key, img):
+        """Store a newly extracted icon and drop any stale decoded copy"""
+        self.store.put(key, img)
+        with self.lock:
+            self.images.pop(key, None)
+            self.ctk_images.pop(key, None)
+
+    def image(self, icon_path):
+        """Decoded 32x32 PIL image for icon_path, or None if it isn't cached"""
+        if not icon_path:
+            return None
+        key = self.key_for(icon_path)
+        with self.lock:
+            img = self.images.get(key)
+            if img is not None:
+                self.images.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        img = self.store.get(key)
+        if img is None:
+            return None
+
+        with self.lock:
+            self.images[key] = img
+            while len(self.images) > self.max_items:
+                evicted, _ = self.images.popitem(last=False)
+                self.ctk_images.pop(evicted, None)
+        return img
+
+    def ctk_image(self, icon_path):
+        """Shared CTkImage for icon_path; call from the Tk thread"""
+        img = self.image(icon_path)
+        if img is None:
+            return None
+        key = self.key_for(icon_path)
+        with self.lock:
+            ctk_img = self.ctk_images.get(key)
+        if ctk_img is None:
+            import customtkinter
+            ctk_img = customtkinter.CTkImage(light_image=img, size=ICON_SIZE)
+            with self.lock:
+                if key in self.images:
+                    self.ctk_images[key] = ctk_img
+        return ctk_img
+
+    def prewarm(self, icon_paths):
+        """Decode icons in the background so the first UI build finds them in memory"""
+        paths = list(icon_paths)[:self.max_items]
+        thread = threading.Thread(target=lambda: [self.image(path) for path in paths], daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.store.close()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'decoded': len(self.images),
+                'stored': len(self.store),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,215 @@
+import os
+import mmap
+import hashlib
+import threading
+
+ICON_SIZE = (32, 32)
+PIXEL_BYTES = ICON_SIZE[0] * ICON_SIZE[1] * 4
+DIGEST_BYTES = 16
+RECORD_BYTES = DIGEST_BYTES + PIXEL_BYTES
+
+
+def icon_key(exe_path):
+    """Key an executable's icon is stored under"""
+    return hashlib.md5(exe_path.encode()).hexdigest()
+
+
+def key_digest(key):
+    """16-byte index form of a key; md5 hex keys map to their raw bytes"""
+    try:
+        if len(key) == 2 * DIGEST_BYTES:
+            return bytes.fromhex(key)
+    except ValueError:
+        pass
+    return hashlib.md5(key.encode()).digest()
+
+
+class IconStore:
+    """All cached icons packed into one file of fixed-size RGBA slots.
+
+    icons.bin holds one record per slot: the key's 16-byte digest followed by
+    32x32 RGBA pixels. icons.idx lists the digest of every slot in order, so
+    opening the store reads 16 bytes per icon instead of listing and stat-ing
+    a directory. Reads come straight out of a read-only memory map. put()
+    appends a slot (a replaced icon leaves its old slot dead until compact()
+    rewrites the live ones), and every read checks the slot's digest, so an
+    index left behind by a crash is detected and rebuilt from the pack.
+    """
+
+    def __init__(self, cache_dir, name="icons"):
+        self.cache_dir = cache_dir
+        self.pack_path = os.path.join(cache_dir, f"{name}.bin")
+        self.index_path = os.path.join(cache_dir, f"{name}.idx")
+        self.lock = threading.Lock()
+        self.slots = {}      # digest -> slot
+        self.count = 0       # slots in the pack, live or dead
+        self._pack = None
+        self._index = None
+        self._map = None
+        self._mapped = 0     # slots covered by _map
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.open()
+
+    def open(self):
+        """Load the index, dropping torn tails and rebuilding it if it disagrees with the pack"""
+        pack_size = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+        self.count = pack_size // RECORD_BYTES
+        if pack_size % RECORD_BYTES:
+            with open(self.pack_path, "r+b") as f:
+                f.truncate(self.count * RECORD_BYTES)
+
+        data = b""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        digests = [data[i:i + DIGEST_BYTES] for i in range(0, len(data) - DIGEST_BYTES + 1, DIGEST_BYTES)]
+
+        self._pack = open(self.pack_path, "a+b")
+        if len(digests) > self.count or (digests and self.read_digest(len(digests) - 1) != digests[-1]):
+            digests = self.scan_digests()
+            self.write_index(digests)
+        elif len(digests) < self.count or len(data) % DIGEST_BYTES:
+            # Slots appended after the last index write
+            digests += [self.read_digest(slot) for slot in range(len(digests), self.count)]
+            self.write_index(digests)
+
+        self.slots = {digest: slot for slot, digest in enumerate(digests)}
+        self._index = open(self.index_path, "ab")
+
+    def scan_digests(self):
+        return [self.read_digest(slot) for slot in range(self.count)]
+
+    def read_digest(self, slot):
+        self._pack.seek(slot * RECORD_BYTES)
+        return self._pack.read(DIGEST_BYTES)
+
+    def write_index(self, digests):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(digests))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def __contains__(self, key):
+        return key_digest(key) in self.slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def put(self, key, img):
+        """Store img (any PIL image) under key, replacing any previous icon"""
+        pixels = img.convert("RGBA").resize(ICON_SIZE).tobytes()
+        digest = key_digest(key)
+        with self.lock:
+            self._pack.seek(0, os.SEEK_END)
+            self._pack.write(digest + pixels)
+            self._pack.flush()
+            self._index.write(digest)
+            self._index.flush()
+            self.slots[digest] = self.count
+            self.count += 1
+
+    def get_bytes(self, key):
+        """Raw 32x32 RGBA pixels for key, or None"""
+        digest = key_digest(key)
+        with self.lock:
+            slot = self.slots.get(digest)
+            if slot is None:
+                return None
+            if slot >= self._mapped:
+                self.remap()
+            offset = slot * RECORD_BYTES
+            if self._map[offset:offset + DIGEST_BYTES] != digest:
+                # Index and pack disagree; forget the slot so the icon is extracted again
+                del self.slots[digest]
+                return None
+            return self._map[offset + DIGEST_BYTES:offset + RECORD_BYTES]
+
+    def get(self, key):
+        """Decoded PIL image for key, or None"""
+        pixels = self.get_bytes(key)
+        if pixels is None:
+            return None
+        from PIL import Image
+        return Image.frombytes("RGBA", ICON_SIZE, pixels)
+
+    def remap(self):
+        if self._map is not None:
+            self._map.close()
+        self._pack.flush()
+        self._map = mmap.mmap(self._pack.fileno(), self.count * RECORD_BYTES, access=mmap.ACCESS_READ)
+        self._mapped = self.count
+
+    def dead_slots(self):
+        return self.count - len(self.slots)
+
+    def compact(self):
+        """Rewrite the pack with only live slots; returns the number of slots dropped"""
+        with self.lock:
+            dropped = self.count - len(self.slots)
+            if not dropped:
+                return 0
+            live = sorted(self.slots.items(), key=lambda item: item[1])
+            tmp_path = self.pack_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for digest, slot in live:
+                    self._pack.seek(slot * RECORD_BYTES)
+                    f.write(self._pack.read(RECORD_BYTES))
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Windows cannot replace a file that is open or mapped
+            self.close_files()
+            os.replace(tmp_path, self.pack_path)
+            self.write_index([digest for digest, _ in live])
+            self.open()
+            return dropped
+
+    def migrate_directory(self, cache_dir=None, remove=True):
+        """Import <key>.png files from the old one-file-per-icon cache; returns how many"""
+        from PIL import Image
+        cache_dir = cache_dir or self.cache_dir
+        imported = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith(".png"):
+                continue
+            path = os.path.join(cache_dir, name)
+            try:
+                with Image.open(path) as src:
+                    self.put(name[:-4], src)
+                imported.append(path)
+            except Exception as e:
+                print(f"Icon migration skipped {name}: {e}")
+
+        if imported:
+            with self.lock:
+                os.fsync(self._pack.fileno())
+                os.fsync(self._index.fileno())
+            if remove:
+                for path in imported:
+                    os.remove(path)
+        return len(imported)
+
+    def close_files(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped = 0
+        for f in (self._pack, self._index):
+            if f is not None:
+                f.close()
+        self._pack = self._index = None
+
+    def close(self):
+        with self.lock:
+            self.close_files()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'icons': len(self.slots),
+                'dead_slots': self.count - len(self.slots),
+                'bytes': self.count * RECORD_BYTES
+            }
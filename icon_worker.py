@@ -0,0 +1,237 @@
+import os
+import queue
+import threading
+import time
+
+from metrics import METRICS
+
+ICON_SIZE = (32, 32)
+SMTO_ABORTIFHUNG = 0x0002
+DI_MASK = 0x0001
+DI_NORMAL = 0x0003
+
+
+def file_mtime(path):
+    """Modification time of path, or None if it can't be read"""
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+class IconExtractor:
+    """Turns a window / executable into a 32x32 RGBA PIL image, or None"""
+
+    def extract(self, hwnd, exe_path):
+        raise NotImplementedError
+
+
+class Win32IconExtractor(IconExtractor):
+    """Window icon via WM_GETICON with a hang timeout, falling back to the exe's icon"""
+
+    def __init__(self, timeout_ms=500):
+        self.timeout_ms = timeout_ms
+
+    def extract(self, hwnd, exe_path):
+        import win32gui
+        import win32con
+
+        hicon = 0
+        owned = False
+
+        # Ask the window, but give up if it doesn't answer within the timeout
+        if hwnd and win32gui.IsWindow(hwnd):
+            try:
+                _, hicon = win32gui.SendMessageTimeout(hwnd, win32con.WM_GETICON, win32con.ICON_BIG, 0,
+                                                       SMTO_ABORTIFHUNG, self.timeout_ms)
+            except Exception as e:
+                print(f"Window icon request failed: {e}")
+                hicon = 0
+            if not hicon:
+                hicon = win32gui.GetClassLong(hwnd, win32con.GCL_HICON)
+
+        # Fallback to executable extraction if still no handle
+        if not hicon and exe_path:
+            try:
+                large_icons, small_icons = win32gui.ExtractIconEx(exe_path, 0)
+                for extra in list(large_icons[1:]) + list(small_icons):
+                    win32gui.DestroyIcon(extra)
+                if large_icons:
+                    hicon = large_icons[0]
+                    owned = True
+            except Exception as ex:
+                print(f"EXE icon extraction failed: {ex}")
+
+        if not hicon:
+            return None
+
+        try:
+            return self.render(hicon)
+        finally:
+            # Only icons we extracted are ours to destroy; window icons belong to the window
+            if owned:
+                win32gui.DestroyIcon(hicon)
+
+    def render(self, hicon):
+        """Draw an icon handle into a 32-bit bitmap and convert it to PIL"""
+        import win32gui
+        import win32ui
+
+        screen_dc = win32gui.GetDC(0)
+        hdc = win32ui.CreateDCFromHandle(screen_dc)
+        try:
+            image = self.draw(hdc, hicon, DI_NORMAL)
+            if image.getextrema()[3][1] == 0:
+                # Legacy icons have no alpha channel; their AND mask is white where transparent
+                mask = self.draw(hdc, hicon, DI_MASK).convert('L')
+                image.putalpha(mask.point(lambda value: 255 - value))
+            return image
+        finally:
+            hdc.DeleteDC()
+            win32gui.ReleaseDC(0, screen_dc)
+
+    def draw(self, hdc, hicon, flags):
+        """One DrawIconEx pass into a fresh compatible bitmap, as a PIL image"""
+        import win32gui
+        import win32ui
+        from PIL import Image
+
+        mem_dc = hdc.CreateCompatibleDC()
+        bitmap = win32ui.CreateBitmap()
+        try:
+            bitmap.CreateCompatibleBitmap(hdc, *ICON_SIZE)
+            mem_dc.SelectObject(bitmap)
+            win32gui.DrawIconEx(mem_dc.GetSafeHdc(), 0, 0, hicon, ICON_SIZE[0], ICON_SIZE[1], 0, None, flags)
+            bits = bitmap.GetBitmapBits(True)
+            return Image.frombuffer('RGBA', ICON_SIZE, bits, 'raw', 'BGRA', 0, 1).copy()
+        finally:
+            win32gui.DeleteObject(bitmap.GetHandle())
+            mem_dc.DeleteDC()
+
+
+class FakeIconExtractor(IconExtractor):
+    """Solid-colour icons after an optional delay, for exercising the pool off Windows"""
+
+    def __init__(self, delay=0.0, color=(80, 140, 220, 255)):
+        self.delay = delay
+        self.color = color
+        self.calls = 0
+
+    def extract(self, hwnd, exe_path):
+        from PIL import Image
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return Image.new('RGBA', ICON_SIZE, self.color)
+
+
+class IconExtractionPool:
+    """Small worker pool that extracts and stores icons off the monitor thread.
+
+    request() returns immediately; concurrent requests for the same key are
+    merged so each executable is extracted at most once at a time, and every
+    requester's callback(key, ok) runs once save(key, image) has stored the
+    icon (ok is False if extraction failed). An executable whose extraction
+    failed isn't tried again until its modification time changes.
+    """
+
+    def __init__(self, extractor, save, workers=2):
+        self.extractor = extractor
+        self.save = save
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.stopped = False
+        self.pending = {}   # key -> [callbacks]
+        self.failures = {}  # exe path -> mtime it failed at
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def request(self, key, hwnd, exe_path, callback):
+        """Queue extraction unless key is already in flight or known to fail; returns True if newly queued"""
+        mtime = file_mtime(exe_path)
+        with self.lock:
+            known_bad = exe_path in self.failures and self.failures[exe_path] == mtime
+            if known_bad:
+                self.skipped += 1
+        if known_bad:
+            callback(key, False)
+            return False
+
+        with self.lock:
+            callbacks = self.pending.get(key)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return False
+            self.pending[key] = [callback]
+        self.jobs.put((key, hwnd, exe_path))
+        return True
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            key, hwnd, exe_path = job
+            ok = False
+            mtime = file_mtime(exe_path)
+            try:
+                with METRICS.time("icons.extract"):
+                    img = self.extractor.extract(hwnd, exe_path)
+                if img is not None:
+                    # Once stopped, the icon store may already be closed
+                    with self.save_lock:
+                        if not self.stopped:
+                            self.save(key, img)
+                            ok = True
+            except Exception as e:
+                print(f"Icon extraction failed for {exe_path}: {e}")
+
+            with self.lock:
+                callbacks = self.pending.pop(key, [])
+                if ok:
+                    self.completed += 1
+                    self.failures.pop(exe_path, None)
+                else:
+                    self.failed += 1
+                    if exe_path and not self.stopped:
+                        self.failures[exe_path] = mtime
+            for callback in callbacks:
+                try:
+                    callback(key, ok)
+                except Exception as e:
+                    print(f"Icon callback failed: {e}")
+
+    def queue_depth(self):
+        return self.jobs.qsize()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': self.jobs.qsize(),
+                'in_flight': len(self.pending),
+                'completed': self.completed,
+                'failed': self.failed,
+                'known_failures': len(self.failures),
+                'skipped': self.skipped
+            }
+
+    def stop(self, timeout=2.0):
+        """Drop queued jobs and wait up to timeout for extractions in progress; nothing is saved afterwards"""
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self.threads:
+            self.jobs.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        # Waits for a save in progress, so the caller can close the store
+        with self.save_lock:
+            self.stopped = True
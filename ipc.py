@@ -0,0 +1,411 @@
+import os
+import sys
+import json
+import time
+import struct
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from metrics import METRICS
+
+# Every message is a 4-byte big-endian length followed by that many bytes of compact JSON
+FRAME_HEADER = struct.Struct(">I")
+MAX_REQUEST_BYTES = 64 * 1024
+SUBSCRIBER_QUEUE = 256
+RANGE_QUERIES = 2
+
+OPS = ('status', 'current-app', 'range-aggregate', 'title-breakdown', 'subscribe', 'unsubscribe')
+
+
+def default_address():
+    """Per-user Unix socket path, or named pipe on Windows"""
+    if sys.platform == "win32":
+        return r"\\.\pipe\apptracker-" + os.environ.get("USERNAME", "user")
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"apptracker-{os.getuid()}.sock")
+
+
+def encode_frame(message):
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader, limit=None):
+    """Next message from a stream, or None at EOF"""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    length = FRAME_HEADER.unpack(header)[0]
+    if limit is not None and length > limit:
+        raise ValueError(f"Frame of {length} bytes is over the {limit} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+
+class Connection:
+    """One client: requests are answered in order, events are interleaved between frames"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.outbox = asyncio.Queue()
+
+    def send(self, message):
+        self.outbox.put_nowait(encode_frame(message))
+
+    def push_event(self, frame):
+        """Queue an event for a subscriber; False if it has fallen too far behind"""
+        if self.outbox.qsize() >= SUBSCRIBER_QUEUE:
+            return False
+        self.outbox.put_nowait(frame)
+        return True
+
+    async def drain(self):
+        while True:
+            frame = await self.outbox.get()
+            if frame is None:
+                break
+            self.writer.write(frame)
+            await self.writer.drain()
+
+
+class IpcServer(threading.Thread):
+    """Serves live tracker state on a local socket from its own asyncio loop.
+
+    Requests are JSON objects with an "op" from OPS and an optional "id"
+    that is echoed back; replies are {"id", "ok", "result"} or {"id", "ok":
+    false, "error"}. After "subscribe" the connection also receives
+    {"event": "switch", "app", "timestamp"} frames. Anything that needs the
+    data lock runs on the default executor so a slow query never stalls
+    other clients, and the monitor thread only hands each switch to the
+    loop with call_soon_threadsafe(). Subscribers that stop reading are
+    disconnected rather than buffered without bound.
+    """
+
+    def __init__(self, tracker, address=None):
+        super().__init__(daemon=True)
+        self.tracker = tracker
+        self.address = address or default_address()
+        self.loop = None
+        self.stopping = None
+        self.ready = threading.Event()
+        self.error = None
+        self.connections = set()
+        self.subscribers = set()
+        self.handlers = set()
+        self.started = time.time()
+
+        self.requests = 0
+        self.errors = 0
+        self.events_sent = 0
+        self.slow_subscribers = 0
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            print(f"IPC server stopped: {e}")
+            self.error = e
+        finally:
+            self.ready.set()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.range_slots = asyncio.Semaphore(RANGE_QUERIES)
+
+        if sys.platform == "win32":
+            pipes = await self.loop.start_serving_pipe(
+                lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader(), self.handle_client), self.address)
+            self.ready.set()
+            await self.stopping.wait()
+            for pipe in pipes:
+                pipe.close()
+        else:
+            self.remove_stale_socket()
+            server = await asyncio.start_unix_server(self.handle_client, self.address)
+            # Only the user running the tracker may connect
+            os.chmod(self.address, 0o600)
+            self.ready.set()
+            async with server:
+                await self.stopping.wait()
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+        # Hang up on everyone and let their handlers finish before the loop goes away
+        for connection in list(self.connections):
+            connection.writer.transport.abort()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+    def remove_stale_socket(self):
+        """Delete a socket file left by a tracker that died; refuse to steal a live one"""
+        if not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            os.unlink(self.address)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"Another tracker is already serving {self.address}")
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(writer)
+        self.connections.add(connection)
+        self.handlers.add(asyncio.current_task())
+        drainer = asyncio.ensure_future(connection.drain())
+        try:
+            while not drainer.done():
+                try:
+                    request = await read_frame(reader, MAX_REQUEST_BYTES)
+                except ValueError as e:
+                    connection.send({'ok': False, 'error': str(e)})
+                    break
+                if request is None:
+                    break
+                connection.send(await self.dispatch(connection, request))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.discard(connection)
+            self.connections.discard(connection)
+            self.handlers.discard(asyncio.current_task())
+            connection.outbox.put_nowait(None)
+            try:
+                await drainer
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def dispatch(self, connection, request):
+        """Reply to one request"""
+        self.requests += 1
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or request.get('op') not in OPS:
+                raise ValueError(f"Unknown op, expected one of {', '.join(OPS)}")
+            op = request['op']
+            with METRICS.time(f"ipc.{op}"):
+                if op == 'subscribe':
+                    self.subscribers.add(connection)
+                    result = {'subscribed': True}
+                elif op == 'unsubscribe':
+                    self.subscribers.discard(connection)
+                    result = {'subscribed': False}
+                elif op == 'range-aggregate':
+                    async with self.range_slots:
+                        result = await self.loop.run_in_executor(None, self.range_aggregate, request)
+                elif op == 'title-breakdown':
+                    async with self.range_slots:
+                        result = await self.loop.run_in_executor(None, self.title_breakdown, request)
+                elif op == 'status':
+                    result = await self.loop.run_in_executor(None, self.status)
+                else:
+                    result = await self.loop.run_in_executor(None, self.current_app)
+            return {'id': request_id, 'ok': True, 'result': result}
+        except Exception as e:
+            self.errors += 1
+            return {'id': request_id, 'ok': False, 'error': str(e)}
+
+    def status(self):
+        tracker = self.tracker
+        with tracker.data_lock:
+            current_app, seconds = tracker.current_session()
+            categories = dict(tracker.category_data)
+            apps = len(tracker.app_data)
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'current_app': current_app,
+            'session_seconds': seconds,
+            'idle': tracker.idle,
+            'apps': apps,
+            'categories': categories,
+            'journal_seq': tracker.journal.last_seq,
+            'clients': len(self.connections),
+            'subscribers': len(self.subscribers)
+        }
+
+    def current_app(self):
+        tracker = self.tracker
+        with tracker.data_lock:
+            current_app, seconds = tracker.current_session()
+            record = tracker.app_data.get(current_app) if current_app else None
+            return {
+                'app': current_app,
+                'session_seconds': seconds,
+                'category': record.category if record else None,
+                'total_seconds': record.total_time + seconds if record else 0.0
+            }
+
+    def range_aggregate(self, request):
+        """QueryEngine.query over the request's start/end (YYYY-MM-DD), group_by and top_n"""
+        # The engine only takes the lock per period or day, so long ranges don't stall the monitor
+        rows = self.tracker.query_engine.query(request['start'], request['end'], request.get('group_by', 'app'),
+                                               request.get('top_n'), lock=self.tracker.data_lock)
+        return [[key, seconds] for key, seconds in rows]
+
+    def title_breakdown(self, request):
+        """Seconds per window title of request's app between start and end"""
+        if self.tracker.titles is None:
+            raise ValueError("Title tracking is off")
+        rows = self.tracker.titles.breakdown(request['start'], request['end'], request['app'],
+                                             request.get('top_n'), lock=self.tracker.data_lock)
+        return [[title, seconds] for title, seconds in rows]
+
+    def publish_switch(self, app_name):
+        """Tracker listener; runs on the monitor thread and only hands off to the loop"""
+        if self.loop is not None and self.subscribers:
+            self.loop.call_soon_threadsafe(self.broadcast,
+                                           {'event': 'switch', 'app': app_name, 'timestamp': time.time()})
+
+    def broadcast(self, event):
+        frame = encode_frame(event)
+        for connection in list(self.subscribers):
+            if connection.push_event(frame):
+                self.events_sent += 1
+            else:
+                # It isn't reading; cut it loose instead of queueing forever
+                self.slow_subscribers += 1
+                self.subscribers.discard(connection)
+                connection.writer.transport.abort()
+
+    def stop(self):
+        if self.loop is not None and self.stopping is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+        self.join(timeout=5)
+
+    def stats(self):
+        return {
+            'address': self.address,
+            'clients': len(self.connections),
+            'subscribers': len(self.subscribers),
+            'requests': self.requests,
+            'errors': self.errors,
+            'events_sent': self.events_sent,
+            'slow_subscribers': self.slow_subscribers
+        }
+
+
+class IpcClient:
+    """Blocking client for scripts and the command line"""
+
+    def __init__(self, address=None, timeout=5.0):
+        self.address = address or default_address()
+        self.next_id = 0
+        if sys.platform == "win32":
+            self.pipe = open(self.address, "r+b", buffering=0)
+            self.sock = None
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(self.address)
+            self.pipe = self.sock.makefile("rwb", buffering=0)
+
+    def read_exactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.pipe.read(size - len(data))
+            if not chunk:
+                raise ConnectionError("Tracker closed the connection")
+            data += chunk
+        return data
+
+    def receive(self):
+        length = FRAME_HEADER.unpack(self.read_exactly(FRAME_HEADER.size))[0]
+        return json.loads(self.read_exactly(length))
+
+    def request(self, op, **params):
+        """Send one request and return its result; raises RuntimeError on an error reply"""
+        self.next_id += 1
+        self.pipe.write(encode_frame(dict(params, op=op, id=self.next_id)))
+        while True:
+            reply = self.receive()
+            # Switch events may arrive ahead of the reply
+            if reply.get('id') == self.next_id:
+                break
+        if not reply['ok']:
+            raise RuntimeError(reply['error'])
+        return reply['result']
+
+    def status(self):
+        return self.request('status')
+
+    def current_app(self):
+        return self.request('current-app')
+
+    def range_aggregate(self, start, end, group_by='app', top_n=None):
+        return self.request('range-aggregate', start=str(start), end=str(end), group_by=group_by, top_n=top_n)
+
+    def title_breakdown(self, app_name, start, end, top_n=None):
+        return self.request('title-breakdown', app=app_name, start=str(start), end=str(end), top_n=top_n)
+
+    def subscribe(self):
+        """Yield switch events until the connection closes"""
+        self.request('subscribe')
+        if self.sock is not None:
+            self.sock.settimeout(None)
+        while True:
+            try:
+                message = self.receive()
+            except ConnectionError:
+                return
+            if 'event' in message:
+                yield message
+
+    def close(self):
+        self.pipe.close()
+        if self.sock is not None:
+            self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a running tracker")
+    parser.add_argument("--address", help="socket path or pipe name (default: the current user's)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="tracker state and category totals")
+    commands.add_parser("current", help="the app in focus right now")
+    range_parser = commands.add_parser("range", help="usage between two dates")
+    range_parser.add_argument("start", help="YYYY-MM-DD")
+    range_parser.add_argument("end", help="YYYY-MM-DD")
+    range_parser.add_argument("--group-by", default="app", help="comma-separated: app, category, hour, weekday, date")
+    range_parser.add_argument("--top", type=int, help="only the N largest groups")
+    titles_parser = commands.add_parser("titles", help="time per window title of one app between two dates")
+    titles_parser.add_argument("app", help="process name, e.g. msedge.exe")
+    titles_parser.add_argument("start", help="YYYY-MM-DD")
+    titles_parser.add_argument("end", help="YYYY-MM-DD")
+    titles_parser.add_argument("--top", type=int, help="only the N largest titles")
+    commands.add_parser("watch", help="print window switches as they happen")
+    args = parser.parse_args(argv)
+
+    client = IpcClient(args.address)
+    try:
+        if args.command == "status":
+            print(json.dumps(client.status(), indent=2))
+        elif args.command == "current":
+            print(json.dumps(client.current_app(), indent=2))
+        elif args.command == "range":
+            group_by = args.group_by.split(",")
+            for key, seconds in client.range_aggregate(args.start, args.end, group_by, args.top):
+                label = " / ".join(str(part) for part in key) if isinstance(key, list) else str(key)
+                print(f"{label.ljust(40)} {seconds / 3600:8.2f} h")
+        elif args.command == "titles":
+            for title, seconds in client.title_breakdown(args.app, args.start, args.end, args.top):
+                print(f"{title[:60].ljust(60)} {seconds / 3600:8.2f} h")
+        else:
+            for event in client.subscribe():
+                print(f"{time.strftime('%H:%M:%S', time.localtime(event['timestamp']))}  {event['app']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
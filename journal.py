@@ -0,0 +1,74 @@
+import os
+import json
+import threading
+
+
+class UsageJournal:
+    """Append-only log of (app, start, end) usage intervals.
+
+    Every window switch appends one small JSON line instead of rewriting the
+    snapshot files. Records carry an increasing sequence number so a replay
+    can skip whatever a snapshot already contains.
+    """
+
+    def __init__(self, path="usage_journal.jsonl"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_seq = 0
+        self.size_bytes = 0
+        self._file = None
+
+        # Continue numbering after whatever is already on disk
+        for record in self.replay():
+            self.last_seq = max(self.last_seq, record['seq'])
+        if os.path.exists(path):
+            self.size_bytes = os.path.getsize(path)
+
+    def append(self, app_name, start, end):
+        """Append one interval (epoch seconds) and return its sequence number"""
+        with self.lock:
+            self.last_seq += 1
+            record = {'seq': self.last_seq, 'app': app_name, 'start': start, 'end': end}
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            line = json.dumps(record, separators=(',', ':')) + "\n"
+            self._file.write(line)
+            self._file.flush()
+            self.size_bytes += len(line)
+            return self.last_seq
+
+    def replay(self, after_seq=0):
+        """Yield journal records with a sequence number above after_seq"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    continue
+                if record.get('seq', 0) > after_seq:
+                    yield record
+
+    def truncate(self, upto_seq):
+        """Drop records up to upto_seq once they are safely in the snapshots"""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            remaining = list(self.replay(after_seq=upto_seq))
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in remaining:
+                    f.write(json.dumps(record, separators=(',', ':')) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.size_bytes = os.path.getsize(self.path)
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,57 +1,48 @@
-import os
-import hashlib
 import tkinter as tk
 import customtkinter
-import win32gui
-import win32ui
-import win32process
-import win32con
-import win32api
-import psutil
 import threading
-import time
-import json
-from datetime import datetime, timedelta
-from collections import defaultdict
-import pystray
-from PIL import Image
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from tkinter import messagebox
-import io
+from datetime import datetime
+from tkinter import messagebox, filedialog
 
 import reports
+from tracker import Tracker
+from realtime_view import RealtimeView
+from metrics import METRICS
+
+# Milliseconds between hourly chart refreshes
+CHART_REFRESH_MS = 5000
+
+# Hot-path timers (see the Diagnostics tab); cheap enough to leave on, and the refresh period of that tab
+METRICS_ENABLED = True
+DIAGNOSTICS_REFRESH_MS = 2000
 
 class App(customtkinter.CTk):
     def __init__(self):
         super().__init__()
         self.geometry("500x350")
+        METRICS.enabled = METRICS_ENABLED
         self._set_appearance_mode("System")
 
-        # Load existing data
-        self.app_data = defaultdict(lambda: {'total_time': 0.0, 'category': 'Uncategorized', 'exe_path': None, 'icon_path': None})
-        self.category_data = defaultdict(float)
-        self.current_app = None
-        self.last_switch_time = datetime.now()
         self.time_unit = customtkinter.StringVar(value="hours")  # hours/minutes
-        self.load_data()
 
-        # Initialize icon cache
-        self.cache_dir = "icon_cache"
-        os.makedirs(self.cache_dir, exist_ok=True)
-        self.default_icon_path = os.path.join(self.cache_dir, "default_icon.png")
-        self.create_default_icon()
+        # Tracking runs in the GUI-free core; the window is one client of it
+        self.tracker = Tracker(on_switch=lambda app_name: self.after(0, lambda: self.label.configure(text=app_name)),
+                               on_icon=lambda app_name: self.after(0, lambda: self.app_list.update_row(app_name)))
+        self.app_data = self.tracker.app_data
+        self.category_data = self.tracker.category_data
+        self.data_lock = self.tracker.data_lock
+        self.sqlite = self.tracker.sqlite
+        self.hourly_log = self.tracker.hourly_log
+        self.rollups = self.tracker.rollups
+        self.query_engine = self.tracker.query_engine
+        self.icons = self.tracker.icons
+        self.icons.prewarm(record.icon_path for record in self.app_data if record.icon_path)
 
         # Tray icon setup
         self.tray_icon = None
         self.tray_running = False
         self.protocol("WM_DELETE_WINDOW", self.minimize_to_tray)
 
-        # Add hourly logging structure
-        self.hourly_log = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
-        self.load_hourly_data()
-
         # Configure GUI
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
@@ -65,6 +56,8 @@ class App(customtkinter.CTk):
         self.categories_tab = self.tabview.add("Categories")
         self.daily_tab = self.tabview.add("Daily Report")
         self.weekly_tab = self.tabview.add("Weekly Report")
+        self.range_tab = self.tabview.add("Range Report")
+        self.diagnostics_tab = self.tabview.add("Diagnostics")
 
         # Real-time Tab Content
         self.setup_realtime_tab()
@@ -78,9 +71,16 @@ class App(customtkinter.CTk):
         # Weekly Report Tab
         self.setup_weekly_report_tab()
 
+        # Month, year and custom range reports
+        self.setup_range_report_tab()
+
+        # Timers, counters and cache stats
+        self.setup_diagnostics_tab()
+
         # Create textbox with scrollbar
         self.textbox = customtkinter.CTkTextbox(self, wrap="none")
         self.textbox.pack(pady=20, padx=20, fill="both", expand=True)
+        self.realtime_view = RealtimeView(self.textbox, self.format_time)
 
         # Label
         self.label = customtkinter.CTkLabel(self)
@@ -95,7 +95,7 @@ class App(customtkinter.CTk):
         unit_menu = customtkinter.CTkOptionMenu(control_frame,
                                       values=["hours", "minutes", "hh:mm:ss"],
                                       variable=self.time_unit,
-                                      command=lambda _: self.update_gui())
+                                      command=lambda _: self.refresh_gui(full=True))
         unit_menu.pack(side="left", padx=5)
 
         # Right-click context menu
@@ -105,21 +105,21 @@ class App(customtkinter.CTk):
         self.textbox.bind("<Button-3>", self.show_context_menu)
         self.selected_app = None
 
-        # Start monitoring thread
-        self.stop_thread = False
-        self.monitor_thread = threading.Thread(target=self.monitor_active_window)
-        self.monitor_thread.start()
-
-        # Add chart variables
-        self.chart_figure = None
-        self.chart_canvas = None
-        self.chart_colors = plt.cm.tab10.colors
-        self.last_chart_update = datetime.now()
+        # Start monitoring thread, fed by foreground-change events
+        self.tracker.start()
+        self.register_gauges()
 
         # Start GUI updates
         self.update_gui()
+        self.update_chart()
+        self.update_diagnostics()
 
     def setup_realtime_tab(self):
+        # matplotlib is the slowest import by far; only the window needs it
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from chart import HourlyChart
+
         # Create main frame
         self.realtime_frame = customtkinter.CTkFrame(self.realtime_tab)
         self.realtime_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -135,10 +135,13 @@ class App(customtkinter.CTk):
         # Create canvas
         self.chart_canvas = FigureCanvasTkAgg(self.chart_figure, self.realtime_frame)
         self.chart_canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        self.chart = HourlyChart(self.chart_figure, self.chart_ax, self.chart_canvas)
 
     def setup_categories_tab(self):
+        from app_list import VirtualAppList
+
         # Main frame
-        self.categories_main_frame = customtkinter.CTkScrollableFrame(self.categories_tab)
+        self.categories_main_frame = customtkinter.CTkFrame(self.categories_tab)
         self.categories_main_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Category management section
@@ -164,12 +167,18 @@ class App(customtkinter.CTk):
             side="left", padx=5)
 
         # Existing categories list
-        self.categories_list_frame = customtkinter.CTkFrame(self.categories_main_frame)
+        self.categories_list_frame = customtkinter.CTkScrollableFrame(self.categories_main_frame, height=120)
         self.categories_list_frame.pack(fill="x", pady=2)
 
-        # Applications list
-        self.applications_frame = customtkinter.CTkFrame(self.categories_main_frame)
-        self.applications_frame.pack(fill="both", expand=True, pady=10)
+        # Applications list, virtualized so large inventories stay responsive
+        self.app_list = VirtualAppList(
+            self.categories_main_frame,
+            self.app_data,
+            get_categories=lambda: list(self.category_data.keys()),
+            icon_for=self.load_app_icon,
+            on_category_change=self.handle_category_change
+        )
+        self.app_list.pack(fill="both", expand=True, pady=10)
 
         self.update_categories_tab()
 
@@ -186,8 +195,10 @@ class App(customtkinter.CTk):
         btn_frame = customtkinter.CTkFrame(self.daily_tab)
         btn_frame.pack(pady=5)
 
-        customtkinter.CTkButton(btn_frame, text="Generate", command=reports.generate_daily_report).pack(side="left", padx=5)
-        customtkinter.CTkButton(btn_frame, text="Export CSV", command=reports.export_daily_csv).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Generate", command=lambda: reports.generate_daily_report(self)).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Export CSV", command=lambda: reports.export_daily_csv(self)).pack(side="left", padx=5)
+        self.daily_export_status = customtkinter.CTkLabel(btn_frame, text="")
+        self.daily_export_status.pack(side="left", padx=5)
 
     def setup_weekly_report_tab(self):
         # Week selection
@@ -202,17 +213,94 @@ class App(customtkinter.CTk):
         btn_frame = customtkinter.CTkFrame(self.weekly_tab)
         btn_frame.pack(pady=5)
 
-        customtkinter.CTkButton(btn_frame, text="Generate", command=reports.generate_weekly_report).pack(side="left", padx=5)
-        customtkinter.CTkButton(btn_frame, text="Export CSV", command=reports.export_weekly_csv).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Generate", command=lambda: reports.generate_weekly_report(self)).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Export CSV", command=lambda: reports.export_weekly_csv(self)).pack(side="left", padx=5)
+        self.weekly_export_status = customtkinter.CTkLabel(btn_frame, text="")
+        self.weekly_export_status.pack(side="left", padx=5)
+
+    def setup_range_report_tab(self):
+        # Range selection
+        range_frame = customtkinter.CTkFrame(self.range_tab)
+        range_frame.pack(pady=5)
+
+        self.range_start = customtkinter.CTkEntry(range_frame, placeholder_text="From YYYY-MM-DD")
+        self.range_start.pack(side="left", padx=5)
+        self.range_end = customtkinter.CTkEntry(range_frame, placeholder_text="To YYYY-MM-DD")
+        self.range_end.pack(side="left", padx=5)
+        self.range_period = customtkinter.StringVar(value="Custom")
+        customtkinter.CTkOptionMenu(range_frame, values=["Custom", "Month", "Year"],
+                                    variable=self.range_period, width=100).pack(side="left", padx=5)
+
+        # Report display
+        self.range_text = customtkinter.CTkTextbox(self.range_tab, wrap="none")
+        self.range_text.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Buttons
+        btn_frame = customtkinter.CTkFrame(self.range_tab)
+        btn_frame.pack(pady=5)
+
+        customtkinter.CTkButton(btn_frame, text="Generate", command=lambda: reports.generate_range_report(self)).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Export CSV", command=lambda: reports.export_range(self, 'csv')).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Export Columnar", command=lambda: reports.export_range(self, 'columnar')).pack(side="left", padx=5)
+        self.range_export_status = customtkinter.CTkLabel(btn_frame, text="")
+        self.range_export_status.pack(side="left", padx=5)
+
+    def setup_diagnostics_tab(self):
+        # Controls
+        btn_frame = customtkinter.CTkFrame(self.diagnostics_tab)
+        btn_frame.pack(pady=5)
+
+        self.metrics_enabled = customtkinter.BooleanVar(value=METRICS.enabled)
+        customtkinter.CTkSwitch(btn_frame, text="Collect timings", variable=self.metrics_enabled,
+                                command=lambda: setattr(METRICS, 'enabled', self.metrics_enabled.get())).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Reset", command=METRICS.reset).pack(side="left", padx=5)
+        customtkinter.CTkButton(btn_frame, text="Dump JSON", command=self.dump_metrics).pack(side="left", padx=5)
+
+        # Metrics display
+        self.diagnostics_text = customtkinter.CTkTextbox(self.diagnostics_tab, wrap="none")
+        self.diagnostics_text.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def register_gauges(self):
+        """Add the widgets' stats() to the tracker's gauges on the Diagnostics tab"""
+        METRICS.gauge("gui.realtime_view", self.realtime_view.stats)
+        METRICS.gauge("gui.chart", self.chart.stats)
+
+    def update_diagnostics(self):
+        """Redraw the Diagnostics tab while it is showing"""
+        if self.tabview.get() == "Diagnostics":
+            snapshot = METRICS.snapshot()
+            lines = [f"Collecting: {'on' if snapshot['enabled'] else 'off'}   uptime {self.format_time(snapshot['uptime_s'])}",
+                     "", "Timers (ms):",
+                     f"  {'name'.ljust(28)} {'count':>8} {'avg':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+            for name, t in snapshot['timers'].items():
+                lines.append(f"  {name.ljust(28)} {t['count']:8d} {t['avg_ms']:8.2f} {t['p50_ms']:8.2f} "
+                             f"{t['p95_ms']:8.2f} {t['p99_ms']:8.2f} {t['max_ms']:8.2f}")
+            lines += ["", "Counters:"]
+            lines += [f"  {name.ljust(28)} {value}" for name, value in snapshot['counters'].items()]
+            lines += ["", "Gauges:"]
+            lines += [f"  {name.ljust(28)} {value}" for name, value in snapshot['gauges'].items()]
+
+            scroll = self.diagnostics_text.yview()[0]
+            self.diagnostics_text.configure(state="normal")
+            self.diagnostics_text.delete("1.0", "end")
+            self.diagnostics_text.insert("end", "\n".join(lines))
+            self.diagnostics_text.configure(state="disabled")
+            self.diagnostics_text.yview_moveto(scroll)
+        self.after(DIAGNOSTICS_REFRESH_MS, self.update_diagnostics)
+
+    def dump_metrics(self):
+        """Save the current metrics snapshot as JSON"""
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            METRICS.dump(file_path)
 
     def add_new_category_manual(self):
         new_category = self.new_category_entry.get().strip()
         if new_category:
-            if new_category not in self.category_data:
-                self.category_data[new_category] = 0.0
+            if self.tracker.add_category(new_category):
                 self.new_category_entry.delete(0, "end")
                 self.update_categories_tab()
-                self.save_data()
             else:
                 messagebox.showwarning("Duplicate", "Category already exists!")
         else:
@@ -256,27 +344,24 @@ class App(customtkinter.CTk):
         self.update_applications_list()
 
     def handle_category_change(self, app_name, new_category):
+        created = False
         if new_category == "Create New...":
             dialog = customtkinter.CTkInputDialog(text="Enter new category name:", title="New Category")
             new_category = dialog.get_input()
             if not new_category:
+                self.app_list.update_row(app_name)
                 return
-            if new_category not in self.category_data:
-                self.category_data[new_category] = 0.0
+            created = self.tracker.add_category(new_category)
 
         if new_category in self.category_data:
-            # Update category time totals
-            old_category = self.app_data[app_name]['category']
-            self.category_data[old_category] -= self.app_data[app_name]['total_time']
-            self.category_data[new_category] += self.app_data[app_name]['total_time']
-
-            # Update app data
-            self.app_data[app_name]['category'] = new_category
+            self.tracker.assign_category(app_name, new_category)
 
-            # Update UI and save
-            self.update_categories_tab()
-            self.update_gui()
-            self.save_data()
+            # Update UI; only a new category needs the lists rebuilt
+            if created:
+                self.update_categories_tab()
+            else:
+                self.app_list.update_row(app_name, recategorized=True)
+            self.refresh_gui()
         else:
             messagebox.showwarning("Invalid", "Selected category doesn't exist")
 
@@ -292,17 +377,9 @@ class App(customtkinter.CTk):
                 messagebox.showwarning("Error", "Category already exists!")
                 return
 
-            # Update category data
-            self.category_data[new_name] = self.category_data.pop(old_name)
-
-            # Update app data
-            for app in self.app_data.values():
-                if app['category'] == old_name:
-                    app['category'] = new_name
-
-            self.save_data()
+            self.tracker.rename_category(old_name, new_name)
             self.update_categories_tab()
-            self.update_gui()
+            self.refresh_gui()
 
     def delete_category(self, category):
         if category == "Uncategorized":
@@ -310,51 +387,17 @@ class App(customtkinter.CTk):
             return
 
         if messagebox.askyesno("Confirm", f"Delete category '{category}'? Apps will be moved to 'Uncategorized'"):
-            # Reassign apps
-            for app in self.app_data.values():
-                if app['category'] == category:
-                    app['category'] = "Uncategorized"
-
-            # Remove category
-            del self.category_data[category]
-
-            self.save_data()
+            self.tracker.delete_category(category)
             self.update_categories_tab()
-            self.update_gui()
+            self.refresh_gui()
 
     def update_applications_list(self):
-        # Clear existing applications list
-        for widget in self.applications_frame.winfo_children()[1:]:  # Skip header
-            widget.destroy()
+        """Re-filter the virtual applications list; no row widgets are rebuilt"""
+        self.app_list.refresh()
 
-        # Create application rows
-        for app_name, app_info in self.app_data.items():
-            row_frame = customtkinter.CTkFrame(self.applications_frame)
-            row_frame.pack(fill="x", pady=2)
-
-            # Application icon and name
-            icon_frame = customtkinter.CTkFrame(row_frame, width=200, height=50)
-            icon_frame.pack_propagate(False)
-            icon_frame.pack(side="left", padx=5)
-
-            if app_info['icon_path'] and os.path.exists(app_info['icon_path']):
-                icon_image = customtkinter.CTkImage(
-                    light_image=Image.open(app_info['icon_path']),
-                    size=(32, 32)
-                )
-                customtkinter.CTkLabel(icon_frame, image=icon_image, text="").pack(side="left")
-            customtkinter.CTkLabel(icon_frame, text=app_name).pack(side="left", padx=5)
-
-            # Category selector
-            category_var = customtkinter.StringVar(value=app_info['category'])
-            category_dropdown = customtkinter.CTkOptionMenu(
-                row_frame,
-                values=list(self.category_data.keys()) + ["Create New..."],
-                variable=category_var,
-                command=lambda val, app=app_name: self.handle_category_change(app, val),
-                width=150
-            )
-            category_dropdown.pack(side="left", padx=5)
+    def load_app_icon(self, record):
+        """CTkImage for an app row, or None if it has no cached icon"""
+        return self.icons.ctk_image(record.icon_path)
 
     def minimize_to_tray(self):
         """Hide window and create tray icon"""
@@ -364,6 +407,9 @@ class App(customtkinter.CTk):
     def create_tray_icon(self):
         """Create system tray icon with menu"""
         if not self.tray_running:
+            import pystray
+            from PIL import Image
+
             # Generate blank image for tray icon
             image = Image.new('RGB', (64, 64), (255, 255, 255))
 
@@ -385,358 +431,39 @@ class App(customtkinter.CTk):
             self.tray_icon.stop()
             self.tray_running = False
 
-    def get_active_process(self):
-        _, pid = win32process.GetWindowThreadProcessId( win32gui.GetForegroundWindow())
-
-        try:
-            return psutil.Process(pid).name()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return "Unknown"
-
-    def get_active_app(self):
-        _, pid = win32process.GetWindowThreadProcessId(win32gui.GetForegroundWindow())
-
-        try:
-            return _, pid
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return "Unknown"
-
-    def create_default_icon(self):
-        """Create a default icon if it doesn't exist"""
-        if not os.path.exists(self.default_icon_path):
-            img = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
-            img.save(self.default_icon_path)
-
-    def get_icon_path(self, hwnd):
-        """Get cached icon path for a window, create if needed"""
-        try:
-            # Get process information
-            _, pid = win32process.GetWindowThreadProcessId(win32gui.GetForegroundWindow())
-            process = psutil.Process(pid)
-            exe_path = process.exe()
-
-            if not exe_path:
-                return self.default_icon_path
-
-            # Create unique hash for the executable
-            hash_key = hashlib.md5(exe_path.encode()).hexdigest()
-            cache_path = os.path.join(self.cache_dir, f"{hash_key}.png")
-
-            if not os.path.exists(cache_path):
-                # Extract and save the icon
-                self.save_icon_from_exe(hwnd, exe_path, cache_path)
-
-            return cache_path
-
-        except Exception as e:
-            print(f"Error getting icon path: {e}")
-            return self.default_icon_path
-
-    def save_icon_from_exe(self, hwnd, exe_path, save_path):
-        """Safely extract and save application icon with handle validation"""
-        hicon = None
-        hdc = None
-        hbmp = None
-
-        try:
-            # Attempt to get icon from window handle
-            if hwnd and win32gui.IsWindow(hwnd):
-                hicon = win32gui.SendMessage(hwnd, win32con.WM_GETICON, win32con.ICON_BIG, 0)
-                if not hicon:
-                    hicon = win32gui.GetClassLong(hwnd, win32con.GCL_HICON)
-
-            # Fallback to executable extraction if still no handle
-            if not hicon and exe_path:
-                try:
-                    large_icons, _ = win32gui.ExtractIconEx(exe_path, 0)
-                    if large_icons:
-                        hicon = large_icons[0]
-                except Exception as ex:
-                    print(f"EXE icon extraction failed: {ex}")
-
-            # Final fallback to default icon
-            if not hicon:
-                print("No icon handles found, using default")
-                return self.default_icon_path
-
-            # Validate icon handle by trying to get its info
-            try:
-                icon_info = win32gui.GetIconInfo(hicon)
-            except Exception as e:
-                print(f"Invalid icon handle: {str(e)}")
-                return self.default_icon_path
-
-            # Rest of the code remains the same...
-            # ... [previous implementation] ...
-
-        except Exception as e:
-            print(f"Icon save error: {str(e)}")
-            if not os.path.exists(save_path):
-                Image.new('RGBA', (32, 32), (0, 0, 0, 0)).save(save_path)
-            return save_path
-
-        finally:
-            # Cleanup GDI objects
-            if hbmp: win32gui.DeleteObject(hbmp)
-            if hdc: win32gui.DeleteDC(hdc)
-            if hicon: win32gui.DestroyIcon(hicon)
-
-    def get_icon_from_hwnd(self, hwnd):
-        try:
-            # Try to get large icon first
-            hicon = win32gui.SendMessage(hwnd, win32con.WM_GETICON, win32con.ICON_BIG, 0)
-            if not hicon:
-                hicon = win32gui.GetClassLong(hwnd, win32con.GCL_HICON)
-
-            if not hicon:
-                # Fallback to executable icon
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                process = psutil.Process(pid)
-                exe_path = process.exe()
-                large_icons, _ = win32gui.ExtractIconEx(exe_path, 0)
-                hicon = large_icons[0] if large_icons else 0
-
-            if hicon:
-                # Get icon info
-                icon_info = win32gui.GetIconInfo(hicon)
-                width = icon_info[5]  # xHotspot = width
-                height = icon_info[6] # yHotspot = height
-
-                # Create compatible DC
-                hdc = win32gui.CreateCompatibleDC(0)
-                hbmp = win32gui.CreateCompatibleBitmap(hdc, width, height)
-                win32gui.SelectObject(hdc, hbmp)
-
-                # Draw the icon
-                win32gui.DrawIconEx(hdc, 0, 0, hicon, width, height, 0, 0, 0x0003)
-
-                # Get bitmap using win32ui
-                bmp = win32ui.CreateBitmapFromHandle(hbmp)
-                bmp_info = bmp.GetInfo()
-                bmp_str = bmp.GetBitmapBits(True)
-
-                # Convert to PIL Image
-                img = Image.frombuffer(
-                'RGB',
-                (bmp_info['bmWidth'], bmp_info['bmHeight']),
-                bmp_str, 'raw', 'BGRX', 0, 1
-            )
-
-                # Cleanup resources
-                win32gui.DeleteObject(hbmp)
-                win32gui.DeleteDC(hdc)
-                win32gui.DestroyIcon(hicon)
-
-            return img
-
-        except Exception as e:
-            print(f"Icon error: {e}")
-        return None
-
-    def cache_application_icon(self, hwnd, app_name, exe_path):
-        """Capture and cache application icon"""
-        # Generate unique cache key
-        cache_key = hashlib.md5(f"{app_name}{exe_path}".encode()).hexdigest()
-        cache_path = os.path.join(self.cache_dir, f"{cache_key}.png")
-
-        # Return cached icon if exists
-        if os.path.exists(cache_path):
-            return cache_path
-            #return customtkinter.CTkImage(light_image=Image.open(cache_path), size=(32, 32))
-
-        # Capture new icon
-        icon_img = self.get_icon_from_hwnd(hwnd)
-        if icon_img:
-            try:
-                icon_img.save(cache_path)
-                return cache_path
-                #return customtkinter.CTkImage(light_image=icon_img, size=(32, 32))
-            except Exception as e:
-                print(f"Save failed: {e}")
-
-        # Fallback to default icon
-        return self.default_icon
-
-    def log_hourly_usage(self, app_name, start_time, end_time):
-        """Log time spent in application across hourly intervals"""
-        current = start_time
-        while current < end_time:
-            next_hour = (current + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-            end_segment = min(next_hour, end_time)
-            duration = (end_segment - current).total_seconds()
-
-            date_str = current.strftime("%Y-%m-%d")
-            hour_str = current.strftime("%H:00")
-
-            self.hourly_log[date_str][hour_str][app_name] += duration
-            current = next_hour
-
-    def save_hourly_data(self):
-        """Save hourly data to JSON file"""
-        # Convert defaultdict to regular dict for JSON serialization
-        save_data = {}
-        for date, hours in self.hourly_log.items():
-            save_data[date] = {}
-            for hour, apps in hours.items():
-                save_data[date][hour] = dict(apps)
-
-        with open("hourly_usage.json", "w") as f:
-            json.dump(save_data, f, indent=2)
-
-    def load_hourly_data(self):
-        """Load hourly data from JSON file"""
-        if os.path.exists("hourly_usage.json"):
-            with open("hourly_usage.json", "r") as f:
-                data = json.load(f)
-                for date, hours in data.items():
-                    for hour, apps in hours.items():
-                        self.hourly_log[date][hour] = defaultdict(float, apps)
-
-    def monitor_active_window(self):
-        last_title, last_process = None, None
-
-        while not self.stop_thread:
-            hwnd = win32gui.GetForegroundWindow()
-            current_process = self.get_active_process()
-            _, pid = self.get_active_app()
-            now = datetime.now()
-
-            if current_process != self.current_app:
-                print(f"Window switched to: {current_process}")
-
-                try:
-                    process = psutil.Process(pid)
-                    exe_path = process.exe()
-                    app_name = process.name()
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    app_name = "Unknown"
-                    exe_path = None
-
-                if self.current_app is not None:
-                    # Calculate and log time spent
-                    time_spent = (now - self.last_switch_time).total_seconds()
-                    self.app_data[self.current_app]['total_time'] += time_spent
-
-                    # Log to hourly data
-                    self.log_hourly_usage(self.current_app, self.last_switch_time, now)
-
-                    # Update category time
-                    category = self.app_data[self.current_app]['category']
-                    self.category_data[category] += time_spent
-
-                # Update current app info
-                self.current_app = current_process
-                self.app_data[self.current_app]['exe_path'] = exe_path
-                self.app_data[app_name]['icon_path'] = self.get_icon_path(hwnd)
-                self.last_switch_time = now
-                self.save_data()
-                self.save_hourly_data()  # Save hourly data when switching apps
-                self.label.configure(text=current_process)
-
-            time.sleep(1)  # Check every second
-
     def update_chart(self):
-        self.chart_ax.clear()
-
-        # Get today's data
+        """Refresh today's hourly chart and schedule the next refresh"""
+        # Today's hour by category totals are maintained by the rollups
         today = datetime.now().strftime("%Y-%m-%d")
-        hourly_data = defaultdict(lambda: defaultdict(float))
-
-        # Aggregate only today's data
-        if today in self.hourly_log:
-            for hour_str, apps in self.hourly_log[today].items():
-                hour = int(hour_str.split(':')[0])
-                for app, time in apps.items():
-                    category = self.app_data.get(app, {}).get('category', 'Unknown')
-                    hourly_data[hour][category] += time
-
-        if not hourly_data:
-            self.chart_ax.text(0.5, 0.5, 'No data today',
-                               ha='center', va='center', color='white', fontsize=12)
-            self.chart_canvas.draw()
-            return
-
-        # Prepare data for plotting
-        hours = range(24)  # Always show full 24-hour scale
-        categories = sorted({cat for h_data in hourly_data.values() for cat in h_data.keys()})
-        colors = plt.cm.tab20.colors
-
-        # Create stacked bar chart with zero-filled hours
-        bottom = [0] * 24
-        width = 0.8  # Bar width
-
-        for i, category in enumerate(categories):
-            times = []
-            for hour in hours:
-                # Get time for this category and hour (convert seconds to hours)
-                time = hourly_data.get(hour, {}).get(category, 0) / 3600
-                times.append(time)
-
-            bars = self.chart_ax.bar(
-                hours,
-                times,
-                width,
-                bottom=bottom,
-                label=f"{category} ({sum(times):.1f}h)",
-                color=colors[i]
-            )
-            bottom = [b + t for b, t in zip(bottom, times)]
-
-        # Configure chart appearance
-        self.chart_ax.set_xlabel('Hour of Day', color='white')
-        self.chart_ax.set_ylabel('Total Time (hours)', color='white')
-        self.chart_ax.set_title(f"Today's App Usage by Category ({datetime.now().strftime('%Y-%m-%d')})", color='white')
-        self.chart_ax.set_xticks(range(0, 24))
-        self.chart_ax.set_xticklabels([f"{h:02d}:00" for h in range(24)], rotation=45, color='white')
-        self.chart_ax.tick_params(axis='y', colors='white')
-        self.chart_ax.set_xlim(-0.5, 23.5)  # Full day range
-
-        # Create legend
-        self.chart_ax.legend(
-            loc='upper right',
-            facecolor='#2b2b2b',
-            labelcolor='white',
-            fontsize=8
-        )
+        hours = None
+        with self.data_lock:
+            buckets = self.rollups.hours_by_category(today)
+            if buckets is not None:
+                hours = [dict(cats) for cats in buckets]
 
-        # Redraw canvas
-        #self.chart_canvas.draw()
+        with METRICS.time("gui.update_chart"):
+            self.chart.update(hours, today)
+        self.after(CHART_REFRESH_MS, self.update_chart)
 
     def update_gui(self):
-        """Update the GUI with current tracking data"""
-        # Calculate current session time
-        display_data = {k: v.copy() for k, v in self.app_data.items()}
-        if self.current_app:
-            current_time = (datetime.now() - self.last_switch_time).total_seconds()
-            display_data[self.current_app]['total_time'] += current_time
-
-        # Organize data by category
-        category_dict = defaultdict(list)
-        for app, data in display_data.items():
-            category_dict[data['category']].append((app, data['total_time']))
-
-        # Update chart every 5 seconds
-        if (datetime.now() - self.last_chart_update).total_seconds() > 5:
-            self.update_chart()
-            self.last_chart_update = datetime.now()
-
-        # Update textbox
-        self.textbox.configure(state="normal")
-        self.textbox.delete("1.0", "end")
-
-        # Display categories and apps
-        for category, apps in sorted(category_dict.items(), key=lambda x: sum(t[1] for t in x[1]), reverse=True):
-            total_time = sum(t[1] for t in apps)
-            self.textbox.insert("end", f"[ {category} ] - {self.format_time(total_time)}\n", "category_header")
-
-            for app, time in sorted(apps, key=lambda x: x[1], reverse=True):
-                self.textbox.insert("end", f"  {app.ljust(30)} {self.format_time(time)}\n")
-
-            self.textbox.insert("end", "\n")
-
-        self.textbox.configure(state="disabled")
+        """Update the GUI with current tracking data, once a second"""
+        with METRICS.time("gui.update_gui"):
+            self.refresh_gui()
+            self.app_list.refresh_if_changed()
         self.after(1000, self.update_gui)
 
+    def refresh_gui(self, full=False):
+        """Redraw the Real-time rows that changed, or everything if full"""
+        if full:
+            self.realtime_view.invalidate()
+
+        with self.data_lock:
+            # Calculate current session time
+            current_app, current_time = self.tracker.current_session()
+            changed = self.tracker.take_changed_apps()
+
+            self.realtime_view.refresh(self.app_data, current_app, current_time, changed)
+
     def show_context_menu(self, event):
         """Show right-click context menu"""
         index = self.textbox.index(f"@{event.x},{event.y}")
@@ -766,46 +493,18 @@ class App(customtkinter.CTk):
 
     def set_app_category(self, category):
         """Assign selected app to a category"""
-        if self.selected_app:
-            # Remove old category time
-            old_category = self.app_data[self.selected_app]['category']
-            self.category_data[old_category] -= self.app_data[self.selected_app]['time']
-
-            # Update to new category
-            self.app_data[self.selected_app]['category'] = category
-            self.category_data[category] += self.app_data[self.selected_app]['time']
-
-            self.save_data()
+        if self.selected_app and self.selected_app in self.app_data:
+            self.tracker.assign_category(self.selected_app, category)
 
     def create_new_category(self):
         """Create a new category through dialog"""
         dialog = customtkinter.CTkInputDialog(text="Enter new category name:", title="New Category")
         new_category = dialog.get_input()
 
-        if new_category and new_category not in self.category_data:
-            self.category_data[new_category] = 0.0
+        if new_category and self.tracker.add_category(new_category):
             if self.selected_app:
                 self.set_app_category(new_category)
 
-    def save_data(self):
-        """Save tracking data to JSON file"""
-        data = {
-            'app_data': dict(self.app_data),
-            'category_data': dict(self.category_data)
-        }
-        with open("app_usage.json", "w") as f:
-            json.dump(data, f)
-
-    def load_data(self):
-        """Load tracking data from JSON file"""
-        try:
-            with open("app_usage.json", "r") as f:
-                data = json.load(f)
-                self.app_data.update(data.get('app_data', {}))
-                self.category_data.update(data.get('category_data', {}))
-        except FileNotFoundError:
-            pass
-
     def format_time(self, seconds):
         """Convert seconds to human-readable format"""
         hours = int(seconds // 3600)
@@ -815,9 +514,7 @@ class App(customtkinter.CTk):
 
     def clean_exit(self):
         """Stop monitoring and exit completely"""
-        self.stop_thread = True
-        if self.monitor_thread.is_alive():
-            self.monitor_thread.join()
+        self.tracker.stop()
         if self.tray_icon:
             self.tray_icon.stop()
         self.destroy()
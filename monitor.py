@@ -1,18 +1,10 @@
 import json
 
-def log_time(self, app_name, start, end):
-    current = start
-    while current < end:
-        next_hour = (current + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-        end_time = min(next_hour, end)
-
-        duration = (end_time - current).total_seconds()
-        date_str = current.strftime("%Y-%m-%d")
-        hour_str = current.strftime("%H")
+from bucketing import split_interval
 
-        self.hourly_data[date_str][hour_str][app_name] += duration
-
-        current = next_hour
+def log_time(self, app_name, start, end):
+    for date_str, hour, duration in split_interval(start.timestamp(), end.timestamp()):
+        self.hourly_data[date_str][f"{hour:02d}"][app_name] += duration
 
 def save_data(self):
     # Convert defaultdict to regular dict for JSON serialization
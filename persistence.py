@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import threading
+
+from metrics import METRICS
+
+
+def atomic_write_json(path, data, indent=None):
+    """Write JSON through a temp file, fsync and rename so a crash never truncates path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def json_target(path, indent=None):
+    """Writer function for a target stored as one JSON file"""
+    return lambda data: atomic_write_json(path, data, indent)
+
+
+class PersistenceWriter(threading.Thread):
+    """Dedicated thread that saves dirty state off the monitor and Tk threads.
+
+    Targets are registered with a snapshot function, called while holding the
+    shared data lock so every file reflects one consistent moment, and a write
+    function that does the I/O after the lock is released. mark_dirty() only
+    sets a flag; bursts of changes are coalesced into at most one flush per
+    interval. checkpoint() is captured with each snapshot and after_flush()
+    receives the checkpoint each target was last written with.
+    """
+
+    def __init__(self, lock, interval=30, checkpoint=None, after_flush=None):
+        super().__init__(daemon=True)
+        self.lock = lock
+        self.interval = interval
+        self.checkpoint = checkpoint or (lambda: None)
+        self.after_flush = after_flush
+        self.targets = {}
+        self.dirty = set()
+        self.written = {}
+        self.condition = threading.Condition()
+        self.flush_now = False
+        self.stopped = False
+        self.last_flush = time.monotonic()
+
+        self.flushes = 0
+        self.bytes_written = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_error = None
+
+    def register(self, name, snapshot, write):
+        self.targets[name] = (snapshot, write)
+
+    def mark_dirty(self, *names):
+        with self.condition:
+            self.dirty.update(names)
+            self.condition.notify()
+
+    def request_flush(self):
+        """Flush as soon as possible instead of waiting out the interval"""
+        with self.condition:
+            self.flush_now = True
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not (self.dirty and self.flush_now):
+                    if self.dirty:
+                        # Coalesce: let more changes pile up until the interval has passed
+                        remaining = self.last_flush + self.interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                    else:
+                        self.condition.wait()
+                if self.stopped:
+                    break
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Snapshot every dirty target under the data lock, then write them"""
+        with self.condition:
+            names, self.dirty = self.dirty, set()
+            self.flush_now = False
+        if not names:
+            return
+
+        started = time.perf_counter()
+        failed = set()
+        snapshots = []
+        with METRICS.time("save.snapshot"), self.lock:
+            token = self.checkpoint()
+            for name in sorted(names):
+                try:
+                    snapshots.append((name, self.targets[name][0]()))
+                except Exception as e:
+                    # One broken target must not take the writer thread down with it
+                    print(f"Snapshot of {name} failed: {e}")
+                    self.last_error = f"{name}: {e}"
+                    failed.add(name)
+
+        for name, data in snapshots:
+            try:
+                with METRICS.time(f"save.{name}"):
+                    written = self.targets[name][1](data)
+                self.bytes_written += written or 0
+                self.written[name] = token
+            except Exception as e:
+                # Keep it dirty so the next flush retries
+                print(f"Saving {name} failed: {e}")
+                self.last_error = f"{name}: {e}"
+                failed.add(name)
+        if failed:
+            self.mark_dirty(*failed)
+
+        latency = time.perf_counter() - started
+        self.last_flush = time.monotonic()
+        self.flushes += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+        if self.after_flush and not failed:
+            self.after_flush(dict(self.written))
+
+    def stop(self):
+        """Stop the thread after a final flush"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.join()
+
+    def stats(self):
+        """Flush latency metrics in seconds"""
+        return {
+            'flushes': self.flushes,
+            'pending': sorted(self.dirty),
+            'bytes_written': self.bytes_written,
+            'last_latency': self.last_latency,
+            'avg_latency': self.total_latency / self.flushes if self.flushes else 0.0,
+            'max_latency': self.max_latency,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,262 @@
+import sys
+import json
+import time
+import queue
+import random
+import threading
+from collections import namedtuple
+
+from activity import AdaptiveInterval
+
+# One foreground change: when it happened, which window and which process owns it
+FocusEvent = namedtuple('FocusEvent', ['timestamp', 'hwnd', 'pid', 'title', 'app_name'])
+FocusEvent.__new__.__defaults__ = (None,)
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+
+
+class WindowProbe:
+    """Source of focus-change events consumed by the monitor loop.
+
+    next_event() blocks until the foreground window changes and returns a
+    FocusEvent, or returns None once the probe has been closed or has run
+    out of events. Probes built with track_titles also report title changes
+    of the foreground window, as events for the same process.
+    """
+
+    def start(self):
+        pass
+
+    def next_event(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def queue_depth(self):
+        """Events received but not yet consumed, for the metrics; 0 for probes without a queue"""
+        return 0
+
+
+class Win32EventProbe(WindowProbe):
+    """Foreground changes pushed by SetWinEventHook, no polling at all"""
+
+    def __init__(self, track_titles=False):
+        self.track_titles = track_titles
+        self.last_title = None
+        self.events = queue.Queue()
+        self.closed = False
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise OSError(self._error)
+
+        # Report whatever already has focus so the first interval starts now
+        import win32gui
+        self._push(win32gui.GetForegroundWindow())
+
+    def _push(self, hwnd):
+        import win32gui
+        import win32process
+        if not hwnd:
+            return
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        title = win32gui.GetWindowText(hwnd)
+        self.last_title = title
+        self.events.put(FocusEvent(time.time(), hwnd, pid, title))
+
+    def _push_title(self, hwnd):
+        """Report a renamed window, but only the foreground one and only if its title really changed"""
+        import win32gui
+        if hwnd != win32gui.GetForegroundWindow():
+            return
+        if win32gui.GetWindowText(hwnd) != self.last_title:
+            self._push(hwnd)
+
+    def _pump(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, event_time):
+            try:
+                if event == EVENT_OBJECT_NAMECHANGE:
+                    # Name changes of any object anywhere; only a top-level window's own title matters
+                    if id_object == OBJID_WINDOW and id_child == 0:
+                        self._push_title(hwnd)
+                else:
+                    self._push(hwnd)
+            except Exception as e:
+                print(f"Foreground event error: {e}")
+
+        # Keep a reference so the callback isn't garbage collected
+        self._callback = WinEventProc(on_event)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                                      0, self._callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            self._error = "SetWinEventHook failed"
+            self._ready.set()
+            return
+        title_hook = None
+        if self.track_titles:
+            title_hook = user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE,
+                                                0, self._callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+        if title_hook:
+            user32.UnhookWinEvent(title_hook)
+
+    def next_event(self):
+        if self.closed:
+            return None
+        return self.events.get()
+
+    def close(self):
+        self.closed = True
+        if self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self.events.put(None)
+
+    def queue_depth(self):
+        return self.events.qsize()
+
+
+class PollingProbe(WindowProbe):
+    """Fallback that asks the OS for the foreground window on an adaptive tick.
+
+    Polls every min_interval right after a switch and backs off towards
+    max_interval while focus stays put, so a user flicking between windows
+    is followed closely and an unattended machine wakes rarely.
+    """
+
+    def __init__(self, min_interval=0.25, max_interval=2.0, track_titles=False):
+        self.interval = AdaptiveInterval(min_interval, max_interval)
+        self.track_titles = track_titles
+        self.last_title = None
+        self.closed = threading.Event()
+        self.last_hwnd = None
+        self.last_pid = None
+        self.polls = 0
+
+    def next_event(self):
+        import win32gui
+        import win32process
+
+        while not self.closed.is_set():
+            self.polls += 1
+            hwnd = win32gui.GetForegroundWindow()
+            if hwnd and hwnd != self.last_hwnd:
+                self.interval.reset()
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                self.last_hwnd = hwnd
+                if pid != self.last_pid or self.track_titles:
+                    self.last_pid = pid
+                    self.last_title = win32gui.GetWindowText(hwnd)
+                    return FocusEvent(time.time(), hwnd, pid, self.last_title)
+            elif hwnd and self.track_titles:
+                title = win32gui.GetWindowText(hwnd)
+                if title != self.last_title:
+                    self.interval.reset()
+                    self.last_title = title
+                    return FocusEvent(time.time(), hwnd, self.last_pid, title)
+            self.closed.wait(self.interval.next())
+        return None
+
+    def close(self):
+        self.closed.set()
+
+
+class ReplayProbe(WindowProbe):
+    """Replays recorded or synthetic events, for running the tracker off Windows.
+
+    With realtime=True the gaps between event timestamps are slept (divided
+    by speed); otherwise events are returned as fast as they are consumed.
+    """
+
+    def __init__(self, events, realtime=False, speed=1.0):
+        self.events = iter(events)
+        self.realtime = realtime
+        self.speed = speed
+        self.closed = threading.Event()
+        self.last_timestamp = None
+
+    def next_event(self):
+        if self.closed.is_set():
+            return None
+        event = next(self.events, None)
+        if event is None:
+            return None
+        if self.realtime and self.last_timestamp is not None:
+            if self.closed.wait(max(0.0, event.timestamp - self.last_timestamp) / self.speed):
+                return None
+        self.last_timestamp = event.timestamp
+        return event
+
+    def close(self):
+        self.closed.set()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load events written one JSON object per line"""
+        with open(path, "r", encoding="utf-8") as f:
+            events = [FocusEvent(**json.loads(line)) for line in f if line.strip()]
+        return cls(events, **kwargs)
+
+
+def synthetic_events(apps, count, start=None, mean_dwell=30.0, seed=0):
+    """Generate a deterministic stream of focus changes between apps.
+
+    apps maps app name to a relative weight; each event names its app so no
+    process lookup is needed when replaying.
+    """
+    rng = random.Random(seed)
+    names = sorted(apps)
+    weights = [apps[name] for name in names]
+    pids = {name: 1000 + i for i, name in enumerate(names)}
+    timestamp = time.time() if start is None else start
+    last = None
+
+    for _ in range(count):
+        name = rng.choices(names, weights)[0]
+        if name == last and len(names) > 1:
+            continue
+        last = name
+        yield FocusEvent(timestamp, pids[name], pids[name], name, name)
+        timestamp += rng.expovariate(1.0 / mean_dwell)
+
+
+def make_default_probe(track_titles=False):
+    """Event-driven probe on Windows, falling back to polling if the hook fails"""
+    if sys.platform != "win32":
+        raise RuntimeError("No window probe for this platform, use ReplayProbe")
+    probe = Win32EventProbe(track_titles)
+    try:
+        probe.start()
+        return probe
+    except OSError as e:
+        print(f"Foreground hook unavailable ({e}), polling instead")
+        probe = PollingProbe(track_titles=track_titles)
+        probe.start()
+        return probe
@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+import psutil
+
+import icon_store
+
+
+class ProcessInfo:
+    """Metadata the monitor needs about one running process"""
+    __slots__ = ('pid', 'create_time', 'name', 'exe_path', 'icon_key', 'category')
+
+    def __init__(self, pid, create_time, name, exe_path, icon_key, category):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name
+        self.exe_path = exe_path
+        self.icon_key = icon_key
+        self.category = category
+
+    @property
+    def key(self):
+        return self.pid, self.create_time
+
+
+class ProcessInfoCache:
+    """Bounded LRU of process metadata keyed by (pid, create time).
+
+    A hit costs a dict lookup plus one create-time check, so a recycled pid
+    never returns a stale name; name(), exe() and the icon hash are only
+    fetched on a miss. Entries for processes that have exited simply age
+    out of the LRU.
+    """
+
+    def __init__(self, maxsize=256, category_lookup=None):
+        self.maxsize = maxsize
+        self.category_lookup = category_lookup or (lambda name: 'Uncategorized')
+        self.entries = OrderedDict()  # pid -> ProcessInfo
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, pid):
+        """Return ProcessInfo for pid, or None if the process is gone or inaccessible"""
+        try:
+            process = psutil.Process(pid)
+            create_time = process.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            with self.lock:
+                if self.entries.pop(pid, None) is not None:
+                    self.invalidations += 1
+            return None
+
+        with self.lock:
+            info = self.entries.get(pid)
+            if info is not None:
+                if info.create_time == create_time:
+                    self.entries.move_to_end(pid)
+                    self.hits += 1
+                    return info
+                # The pid now belongs to a different process
+                del self.entries[pid]
+                self.invalidations += 1
+            self.misses += 1
+
+        try:
+            with process.oneshot():
+                name = process.name()
+                try:
+                    exe_path = process.exe()
+                except psutil.AccessDenied:
+                    exe_path = None
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+        icon_key = icon_store.icon_key(exe_path) if exe_path else None
+        info = ProcessInfo(pid, create_time, name, exe_path, icon_key, self.category_lookup(name))
+
+        with self.lock:
+            self.entries[pid] = info
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return info
+
+    def set_category(self, app_name, category):
+        """Keep cached categories in step with category edits"""
+        with self.lock:
+            for info in self.entries.values():
+                if info.name == app_name:
+                    info.category = category
+
+    def rename_category(self, old_name, new_name):
+        with self.lock:
+            for info in self.entries.values():
+                if info.category == old_name:
+                    info.category = new_name
+
+    def stats(self):
+        """Hit/miss counters for confirming the cache is effective"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
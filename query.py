@@ -0,0 +1,159 @@
+from datetime import date, timedelta
+from contextlib import nullcontext
+
+from rollups import period_keys
+
+GROUP_KEYS = ('app', 'category', 'hour', 'weekday', 'date')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def month_end(day):
+    """Last day of the month day falls in"""
+    following = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return following - timedelta(days=1)
+
+
+def cover(start, end, levels=('month', 'week')):
+    """Split start..end (inclusive) into the fewest whole months, ISO weeks and days.
+
+    Yields (level, key, first_day, last_day) with keys in the Rollups format.
+    """
+    day = start
+    while day <= end:
+        if 'month' in levels and day.day == 1 and month_end(day) <= end:
+            last = month_end(day)
+            yield 'month', day.strftime("%Y-%m"), day, last
+        elif 'week' in levels and day.weekday() == 0 and day + timedelta(days=6) <= end:
+            last = day + timedelta(days=6)
+            yield 'week', period_keys(day.isoformat())[0], day, last
+        else:
+            last = day
+            yield 'day', day.isoformat(), day, day
+        day = last + timedelta(days=1)
+
+
+class QueryEngine:
+    """Aggregates usage over any date range, grouped by app, category, hour, weekday or date.
+
+    Queries that don't split by day are answered from the month, week and
+    day rollups, so a year costs twelve dict merges rather than 8760 hourly
+    buckets; hour-of-day profiles use the per-month hour rollups the same
+    way. Only the ragged edges of a range, or groupings by date or weekday
+    combined with hour, read the hourly store. With the SQLite backend the
+    whole query is one GROUP BY.
+
+    Given the data lock, a query only holds it while copying one period's
+    rollups or one day's buckets; partition files are read without it and
+    the summing happens outside, so long ranges never stall the monitor.
+    """
+
+    def __init__(self, store, rollups, category_of, sqlite=None):
+        self.store = store
+        self.rollups = rollups
+        self.category_of = category_of
+        self.sqlite = sqlite
+
+    def query(self, start, end, group_by='app', top_n=None, lock=None):
+        """Seconds per group between two dates, inclusive.
+
+        group_by is one key or a list of keys from GROUP_KEYS; with several
+        keys each result key is a tuple in the same order. Results are sorted
+        by time spent when grouping by app or category (or when top_n is
+        given), otherwise by key. Returns a list of (key, seconds). Without
+        lock, the caller must hold the data lock for the whole query.
+        """
+        dims = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+        for dim in dims:
+            if dim not in GROUP_KEYS:
+                raise ValueError(f"Unknown group_by key: {dim}")
+        start, end = as_date(start), as_date(end)
+
+        if self.sqlite is not None:
+            self.sqlite.flush()
+            totals = self.sqlite.grouped_totals(start.isoformat(), end.isoformat(), dims)
+        else:
+            totals = self.aggregate(start, end, dims, lock)
+
+        if top_n is not None or 'app' in dims or 'category' in dims:
+            rows = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        else:
+            rows = sorted(totals.items())
+        if top_n is not None:
+            rows = rows[:top_n]
+        if len(dims) == 1:
+            rows = [(key[0], seconds) for key, seconds in rows]
+        return rows
+
+    def day_rows(self, date_str, lock):
+        """[(hour, app, seconds)] of one day, copied under lock"""
+        if lock is not None and hasattr(self.store, 'preload'):
+            self.store.preload(date_str[:7], lock)
+        with lock or nullcontext():
+            return list(self.store.iter_day(date_str))
+
+    def aggregate(self, start, end, dims, lock=None):
+        """{key tuple: seconds} from the rollups and, where needed, the hourly store"""
+        guard = lock or nullcontext()
+        category_of = self.category_of
+        by_day = 'date' in dims or 'weekday' in dims
+        per_app = 'app' in dims or 'category' in dims
+        totals = {}
+
+        def add(app_name, seconds, hour=None, day=None, category=None):
+            key = []
+            for dim in dims:
+                if dim == 'app':
+                    key.append(app_name)
+                elif dim == 'category':
+                    key.append(category if category is not None else category_of(app_name))
+                elif dim == 'hour':
+                    key.append(hour)
+                elif dim == 'date':
+                    key.append(day.isoformat())
+                else:
+                    key.append(day.weekday())
+            key = tuple(key)
+            totals[key] = totals.get(key, 0.0) + seconds
+
+        if 'hour' in dims:
+            levels = () if by_day else ('month',)
+            for level, key, first, _ in cover(start, end, levels):
+                if level == 'month':
+                    with guard:
+                        month_hours = [dict(apps) for apps in self.rollups.month_hour_totals(key) or ()]
+                    for hour, apps in enumerate(month_hours):
+                        if not per_app:
+                            if apps:
+                                add(None, sum(apps.values()), hour=hour)
+                            continue
+                        for app_name, seconds in apps.items():
+                            add(app_name, seconds, hour=hour)
+                else:
+                    for hour, app_name, seconds in self.day_rows(key, lock):
+                        add(app_name, seconds, hour=hour, day=first)
+            return totals
+
+        levels = () if by_day else ('month', 'week')
+        if 'category' in dims and 'app' not in dims:
+            # Category rollups are already summed per period
+            for level, key, first, _ in cover(start, end, levels):
+                with guard:
+                    categories = list(self.rollups.category_totals(level, key).items())
+                for category, seconds in categories:
+                    add(None, seconds, day=first, category=category)
+            return totals
+
+        for level, key, first, _ in cover(start, end, levels):
+            with guard:
+                apps = dict(self.rollups.app_totals(level, key))
+            if not per_app:
+                if apps:
+                    add(None, sum(apps.values()), day=first)
+                continue
+            for app_name, seconds in apps.items():
+                add(app_name, seconds, day=first)
+        return totals
@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+
+def out_of_order(order, totals, key):
+    """True if key now has more time than the row above it or less than the row below"""
+    index = order.index(key)
+    if index and totals[order[index - 1]] < totals[key]:
+        return True
+    return index + 1 < len(order) and totals[order[index + 1]] > totals[key]
+
+
+class RealtimeView:
+    """Keeps the Real-time textbox in step with the app records, line by line.
+
+    A full rebuild happens only when the layout changes: an app is added or
+    recategorized (the registry version moves), the ranking of an app or
+    category changes, or invalidate() is called. Otherwise only the lines of
+    apps whose time changed, and their category headers, are rewritten in
+    place, which normally means the current app and one header.
+    """
+
+    def __init__(self, textbox, format_time):
+        self.textbox = textbox
+        self.format_time = format_time
+        self.version = None
+        self.categories = []       # [category] in display order
+        self.apps = {}             # category -> [app] in display order
+        self.totals = {}           # app -> displayed seconds
+        self.category_totals = {}  # category -> displayed seconds
+        self.app_category = {}     # app -> category
+        self.lines = {}            # app or ('category', name) -> 1-based line number
+
+        self.full_refreshes = 0
+        self.line_updates = 0
+
+    def invalidate(self):
+        self.version = None
+
+    def refresh(self, registry, current_app, current_time, changed_apps):
+        """Redraw what changed since the last refresh.
+
+        changed_apps names apps whose recorded total moved since the last call;
+        the current app is always treated as changed.
+        """
+        def displayed(record):
+            total = record.total_time
+            if record.name == current_app:
+                total += current_time
+            return total
+
+        if self.version != registry.version:
+            self.rebuild(registry, displayed)
+            return
+
+        changed = set(changed_apps)
+        if current_app:
+            changed.add(current_app)
+
+        updates = []
+        for app in changed:
+            record = registry.get(app)
+            if record is None or app not in self.totals:
+                self.rebuild(registry, displayed)
+                return
+            total = displayed(record)
+            delta = total - self.totals[app]
+            if not delta:
+                continue
+            category = self.app_category[app]
+            self.totals[app] = total
+            self.category_totals[category] += delta
+            updates.append(app)
+
+        if not updates:
+            return
+
+        # Totals usually grow, but the current session drops to zero when
+        # accounting pauses for idle, so a row can move either way
+        touched = {self.app_category[app] for app in updates}
+        for app in updates:
+            if out_of_order(self.apps[self.app_category[app]], self.totals, app):
+                self.rebuild(registry, displayed)
+                return
+        for category in touched:
+            if out_of_order(self.categories, self.category_totals, category):
+                self.rebuild(registry, displayed)
+                return
+
+        self.textbox.configure(state="normal")
+        for category in touched:
+            self.replace_line(self.lines[('category', category)], self.header_text(category), "category_header")
+        for app in updates:
+            self.replace_line(self.lines[app], self.app_text(app))
+        self.textbox.configure(state="disabled")
+
+    def stats(self):
+        return {'full_refreshes': self.full_refreshes, 'line_updates': self.line_updates}
+
+    def header_text(self, category):
+        return f"[ {category} ] - {self.format_time(self.category_totals[category])}"
+
+    def app_text(self, app):
+        return f"  {app.ljust(30)} {self.format_time(self.totals[app])}"
+
+    def replace_line(self, line, text, tag=None):
+        self.textbox.delete(f"{line}.0", f"{line}.end")
+        if tag:
+            self.textbox.insert(f"{line}.0", text, tag)
+        else:
+            self.textbox.insert(f"{line}.0", text)
+        self.line_updates += 1
+
+    def rebuild(self, registry, displayed):
+        """Regroup, re-sort and redraw everything, keeping the scroll position"""
+        self.version = registry.version
+        self.totals = {}
+        self.app_category = {}
+        grouped = defaultdict(list)
+        for record in registry:
+            total = displayed(record)
+            self.totals[record.name] = total
+            self.app_category[record.name] = record.category
+            grouped[record.category].append(record.name)
+
+        self.category_totals = {category: sum(self.totals[app] for app in apps)
+                                for category, apps in grouped.items()}
+        self.categories = sorted(grouped, key=lambda c: self.category_totals[c], reverse=True)
+        self.apps = {category: sorted(apps, key=lambda a: self.totals[a], reverse=True)
+                     for category, apps in grouped.items()}
+
+        scroll = self.textbox.yview()[0]
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.lines = {}
+        line = 1
+        for category in self.categories:
+            self.textbox.insert("end", self.header_text(category) + "\n", "category_header")
+            self.lines[('category', category)] = line
+            line += 1
+            for app in self.apps[category]:
+                self.textbox.insert("end", self.app_text(app) + "\n")
+                self.lines[app] = line
+                line += 1
+            self.textbox.insert("end", "\n")
+            line += 1
+        self.textbox.configure(state="disabled")
+        self.textbox.yview_moveto(scroll)
+        self.full_refreshes += 1
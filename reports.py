@@ -1,88 +1,153 @@
 from datetime import datetime, timedelta
-from collections import defaultdict
+from tkinter import filedialog
 
-def generate_daily_report(self):
-    date_str = self.daily_date.get() or datetime.now().strftime("%Y-%m-%d")
+from query import month_end, WEEKDAYS
+from exporters import iter_hourly_rows, ExportJob
+
+
+def run_query(self, start, end, group_by='app', top_n=None):
+    """QueryEngine.query, taking the data lock one period or day at a time"""
+    return self.query_engine.query(start, end, group_by, top_n, lock=self.data_lock)
+
+
+def parse_date(entry, default=None):
+    """Date typed into an entry, default (today) if it is empty, None if it doesn't parse"""
+    date_str = entry.get().strip()
+    if not date_str:
+        return default or datetime.now().date()
     try:
-        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
-        return
+        return None
 
-    daily_stats = self.daily_data.get(target_date.isoformat(), {})
-    category_stats = self.category_data.get(target_date.isoformat(), {})
 
-    report = f"Daily Report - {target_date}\n\n"
-    report += "Applications:\n"
-    for app, time in sorted(daily_stats.items(), key=lambda x: x[1], reverse=True):
-        report += f"  {app.ljust(30)} {self.format_time(time)}\n"
+def summary_lines(self, start, end, top_n=None):
+    """Applications and Categories sections for a date range"""
+    lines = ["Applications:"]
+    for app, time in run_query(self, start, end, 'app', top_n):
+        lines.append(f"  {app.ljust(30)} {self.format_time(time)}")
 
-    report += "\nCategories:\n"
-    for cat, time in sorted(category_stats.items(), key=lambda x: x[1], reverse=True):
-        report += f"  {cat.ljust(30)} {self.format_time(time)}\n"
+    lines.append("")
+    lines.append("Categories:")
+    for cat, time in run_query(self, start, end, 'category'):
+        lines.append(f"  {cat.ljust(30)} {self.format_time(time)}")
+    return lines
 
-    self.daily_text.configure(state="normal")
-    self.daily_text.delete("1.0", "end")
-    self.daily_text.insert("end", report)
-    self.daily_text.configure(state="disabled")
 
+def show_report(textbox, lines):
+    textbox.configure(state="normal")
+    textbox.delete("1.0", "end")
+    textbox.insert("end", "\n".join(lines) + "\n")
+    textbox.configure(state="disabled")
 
-def generate_weekly_report(self):
-    date_str = self.weekly_date.get() or datetime.now().strftime("%Y-%m-%d")
-    try:
-        start_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        start_date -= timedelta(days=start_date.weekday())  # Monday start
-    except ValueError:
+
+def generate_daily_report(self):
+    target_date = parse_date(self.daily_date)
+    if target_date is None:
         return
 
-    end_date = start_date + timedelta(days=6)
-    week_dates = [start_date + timedelta(days=i) for i in range(7)]
+    lines = [f"Daily Report - {target_date}", ""]
+    lines += summary_lines(self, target_date, target_date)
+    show_report(self.daily_text, lines)
 
-    weekly_apps = defaultdict(float)
-    weekly_cats = defaultdict(float)
 
-    for date in week_dates:
-        date_str = date.isoformat()
-        for app, time in self.daily_data.get(date_str, {}).items():
-            weekly_apps[app] += time
-        for cat, time in self.category_data.get(date_str, {}).items():
-            weekly_cats[cat] += time
+def generate_weekly_report(self):
+    start_date = parse_date(self.weekly_date)
+    if start_date is None:
+        return
+    start_date -= timedelta(days=start_date.weekday())  # Monday start
+    end_date = start_date + timedelta(days=6)
 
-    report = f"Weekly Report - {start_date} to {end_date}\n\n"
-    report += "Applications:\n"
-    for app, time in sorted(weekly_apps.items(), key=lambda x: x[1], reverse=True):
-        report += f"  {app.ljust(30)} {self.format_time(time)}\n"
+    lines = [f"Weekly Report - {start_date} to {end_date}", ""]
+    lines += summary_lines(self, start_date, end_date)
+    show_report(self.weekly_text, lines)
 
-    report += "\nCategories:\n"
-    for cat, time in sorted(weekly_cats.items(), key=lambda x: x[1], reverse=True):
-        report += f"  {cat.ljust(30)} {self.format_time(time)}\n"
 
-    self.weekly_text.configure(state="normal")
-    self.weekly_text.delete("1.0", "end")
-    self.weekly_text.insert("end", report)
-    self.weekly_text.configure(state="disabled")
+def report_range(period, start_date, end_date):
+    """Expand a Month or Year period around start_date; Custom keeps the dates as typed"""
+    if period == "Month":
+        start_date = start_date.replace(day=1)
+        return start_date, month_end(start_date)
+    if period == "Year":
+        return start_date.replace(month=1, day=1), start_date.replace(month=12, day=31)
+    return start_date, max(start_date, end_date)
 
 
-def export_daily_csv(self):
-    file_path = filedialog.asksaveasfilename(defaultextension=".csv",
-                                             filetypes=[("CSV Files", "*.csv")])
+def generate_range_report(self):
+    start_date = parse_date(self.range_start)
+    end_date = parse_date(self.range_end, default=start_date)
+    if start_date is None or end_date is None:
+        return
+    start_date, end_date = report_range(self.range_period.get(), start_date, end_date)
+
+    lines = [f"Usage Report - {start_date} to {end_date}", ""]
+    lines += summary_lines(self, start_date, end_date, top_n=50)
+
+    lines.append("")
+    lines.append("By weekday:")
+    for weekday, time in run_query(self, start_date, end_date, 'weekday'):
+        lines.append(f"  {WEEKDAYS[weekday].ljust(30)} {self.format_time(time)}")
+
+    lines.append("")
+    lines.append("By hour of day:")
+    for hour, time in run_query(self, start_date, end_date, 'hour'):
+        lines.append(f"  {f'{hour:02d}:00'.ljust(30)} {self.format_time(time)}")
+
+    show_report(self.range_text, lines)
+
+
+def hourly_rows(self, start_date, end_date):
+    """Stream (date, hour, app, category, seconds) rows from whichever backend is active"""
+    if self.sqlite is not None:
+        self.sqlite.flush()
+        yield from self.sqlite.iter_hourly(start_date.isoformat(), end_date.isoformat())
+    else:
+        yield from iter_hourly_rows(self.hourly_log, self.app_data.category_of,
+                                    start_date, end_date, self.data_lock)
+
+
+def start_export(self, start_date, end_date, fmt, status_label):
+    """Ask for a file and export hourly rows for the range on a background thread"""
+    if fmt == 'columnar':
+        file_path = filedialog.asksaveasfilename(defaultextension=".atc",
+                                                 filetypes=[("Columnar export", "*.atc")])
+    else:
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                 filetypes=[("CSV Files", "*.csv")])
     if not file_path:
         return
 
-    date_str = self.daily_date.get() or datetime.now().strftime("%Y-%m-%d")
-    daily_stats = self.daily_data.get(date_str, {})
+    def progress(fraction, rows):
+        self.after(0, lambda: status_label.configure(text=f"Exporting... {fraction:.0%} ({rows} rows)"))
+
+    def done(rows, error):
+        text = f"Export failed: {error}" if error else f"Exported {rows} rows"
+        self.after(0, lambda: status_label.configure(text=text))
+
+    status_label.configure(text="Exporting...")
+    ExportJob(hourly_rows(self, start_date, end_date), file_path, fmt,
+              start_date, end_date, progress, done).start()
 
-    with open(file_path, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Application", "Time Spent", "Category"])
-        for app, time in daily_stats.items():
-            category = self.get_app_category(app)
-            writer.writerow([app, time, category])
+
+def export_daily_csv(self):
+    target_date = parse_date(self.daily_date)
+    if target_date is None:
+        return
+    start_export(self, target_date, target_date, 'csv', self.daily_export_status)
 
 
 def export_weekly_csv(self):
-    file_path = filedialog.asksaveasfilename(defaultextension=".csv",
-                                             filetypes=[("CSV Files", "*.csv")])
-    if not file_path:
+    start_date = parse_date(self.weekly_date)
+    if start_date is None:
         return
+    start_date -= timedelta(days=start_date.weekday())  # Monday start
+    start_export(self, start_date, start_date + timedelta(days=6), 'csv', self.weekly_export_status)
+
 
-    # ... Similar to daily export but aggregate weekly data ...
+def export_range(self, fmt):
+    start_date = parse_date(self.range_start)
+    end_date = parse_date(self.range_end, default=start_date)
+    if start_date is None or end_date is None:
+        return
+    start_date, end_date = report_range(self.range_period.get(), start_date, end_date)
+    start_export(self, start_date, end_date, fmt, self.range_export_status)
@@ -0,0 +1,157 @@
+from datetime import date
+from collections import defaultdict
+
+
+def period_keys(date_str):
+    """ISO week ("2025-W10") and month ("2025-03") a day belongs to"""
+    year, week, _ = date.fromisoformat(date_str).isocalendar()
+    return f"{year}-W{week:02d}", date_str[:7]
+
+
+class Rollups:
+    """Materialized app and category totals per day, ISO week and month.
+
+    record() is called for every hourly segment logged, so each report reads
+    one precomputed dict instead of re-summing hours or days. month_hours
+    keeps an hour-of-day by app profile per month for hour queries over long
+    ranges. The hour by category breakdown the chart needs is kept for the
+    latest day only.
+
+    Everything is derived from the day totals and month_hours, so the
+    rollups are saved one month at a time: dirty names the months changed
+    since the last snapshot(), and load_month() re-adds a saved month's days
+    to the week and month totals.
+    """
+
+    LEVELS = ('day', 'week', 'month')
+
+    def __init__(self):
+        self.apps = {level: defaultdict(lambda: defaultdict(float)) for level in self.LEVELS}
+        self.categories = {level: defaultdict(lambda: defaultdict(float)) for level in self.LEVELS}
+        self.month_hours = defaultdict(lambda: [defaultdict(float) for _ in range(24)])
+        self.hours_date = None
+        self.hour_categories = [defaultdict(float) for _ in range(24)]
+        self.dirty = set()
+        self._keys = {}
+
+    def _periods(self, date_str):
+        keys = self._keys.get(date_str)
+        if keys is None:
+            week, month = period_keys(date_str)
+            keys = self._keys[date_str] = (('day', date_str), ('week', week), ('month', month))
+        return keys
+
+    def record(self, date_str, hour, app_name, category, seconds):
+        """Add one hourly segment to every rollup"""
+        for level, key in self._periods(date_str):
+            self.apps[level][key][app_name] += seconds
+            self.categories[level][key][category] += seconds
+        self.month_hours[date_str[:7]][hour][app_name] += seconds
+        self.dirty.add(date_str[:7])
+
+        if self.hours_date is None or date_str > self.hours_date:
+            self.hours_date = date_str
+            self.hour_categories = [defaultdict(float) for _ in range(24)]
+        if date_str == self.hours_date:
+            self.hour_categories[hour][category] += seconds
+
+    def app_totals(self, level, key):
+        return self.apps[level].get(key, {})
+
+    def category_totals(self, level, key):
+        return self.categories[level].get(key, {})
+
+    def month_hour_totals(self, month):
+        """24 dicts of app -> seconds for one month"""
+        return self.month_hours.get(month)
+
+    def hours_by_category(self, date_str):
+        """24 dicts of category -> seconds, or None if date_str isn't the latest day"""
+        if date_str != self.hours_date:
+            return None
+        return self.hour_categories
+
+    def recategorize(self, app_name, old_category, new_category, store):
+        """Move an app's history from one category to another"""
+        if old_category == new_category:
+            return
+        self.dirty.update(self.apps['month'])
+        for level in self.LEVELS:
+            categories = self.categories[level]
+            for key, apps in self.apps[level].items():
+                seconds = apps.get(app_name)
+                if seconds:
+                    categories[key][old_category] -= seconds
+                    categories[key][new_category] += seconds
+                    if abs(categories[key][old_category]) < 1e-6:
+                        del categories[key][old_category]
+
+        if self.hours_date is not None:
+            for hour, buckets in enumerate(self.hour_categories):
+                seconds = store.get(self.hours_date, hour, app_name)
+                if seconds:
+                    buckets[old_category] -= seconds
+                    buckets[new_category] += seconds
+                    if abs(buckets[old_category]) < 1e-6:
+                        del buckets[old_category]
+
+    def rename_category(self, old_name, new_name):
+        self.dirty.update(self.apps['month'])
+        for level in self.LEVELS:
+            for totals in self.categories[level].values():
+                if old_name in totals:
+                    totals[new_name] += totals.pop(old_name)
+        for buckets in self.hour_categories:
+            if old_name in buckets:
+                buckets[new_name] += buckets.pop(old_name)
+
+    def rebuild(self, store, category_of):
+        """Recompute everything from an HourlyStore"""
+        self.__init__()
+        for date_str in store.dates():
+            for hour, app_name, seconds in store.iter_day(date_str):
+                self.record(date_str, hour, app_name, category_of(app_name), seconds)
+
+    def rebuild_month(self, store, month, category_of):
+        """Recompute one month, not yet loaded, from the store"""
+        for date_str in store.dates():
+            if date_str.startswith(month):
+                for hour, app_name, seconds in store.iter_day(date_str):
+                    self.record(date_str, hour, app_name, category_of(app_name), seconds)
+
+    def month_json(self, month):
+        """The day totals and hour profile of one month, which is all load_month() needs"""
+        return {
+            'days': {date_str: {'apps': dict(apps), 'categories': dict(self.categories['day'].get(date_str, {}))}
+                     for date_str, apps in sorted(self.apps['day'].items()) if date_str.startswith(month)},
+            'month_hours': [dict(apps) for apps in self.month_hours.get(month, ())]
+        }
+
+    def load_month(self, month, data):
+        """Add a month saved by month_json() to every rollup"""
+        for date_str, totals in data['days'].items():
+            for level, key in self._periods(date_str):
+                for app_name, seconds in totals['apps'].items():
+                    self.apps[level][key][app_name] += seconds
+                for category, seconds in totals['categories'].items():
+                    self.categories[level][key][category] += seconds
+        if data['month_hours']:
+            for hour, apps in enumerate(data['month_hours']):
+                self.month_hours[month][hour].update(apps)
+
+    def snapshot(self, seq_of):
+        """{month: month_json() plus '_journal_seq'} for the dirty months; seq_of(month) gives the sequence"""
+        months = {}
+        for month in sorted(self.dirty):
+            data = {'_journal_seq': seq_of(month)}
+            data.update(self.month_json(month))
+            months[month] = data
+        self.dirty = set()
+        return months
+
+    def load_hours(self, store, date_str, category_of):
+        """Fill the hour by category breakdown for date_str from the store"""
+        self.hours_date = date_str
+        self.hour_categories = [defaultdict(float) for _ in range(24)]
+        for hour, app_name, seconds in store.iter_day(date_str):
+            self.hour_categories[hour][category_of(app_name)] += seconds
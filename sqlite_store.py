@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from bucketing import split_interval
+from journal import UsageJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    total_time REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS apps (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    total_time REAL NOT NULL DEFAULT 0,
+    exe_path TEXT,
+    icon_path TEXT
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    id INTEGER PRIMARY KEY,
+    app_id INTEGER NOT NULL REFERENCES apps(id),
+    start REAL NOT NULL,
+    end REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hourly (
+    date TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    app_id INTEGER NOT NULL REFERENCES apps(id),
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    seconds REAL NOT NULL,
+    PRIMARY KEY (date, hour, app_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hourly_category_date ON hourly (category_id, date);
+CREATE INDEX IF NOT EXISTS intervals_start ON intervals (start);
+"""
+
+
+class SqliteStorage:
+    """Optional SQLite backend for apps, categories, raw intervals and hourly buckets.
+
+    Writes are buffered and committed in batches; flush() runs one transaction
+    for everything queued since the last flush. Each thread gets its own
+    connection, and WAL mode lets the UI query while the monitor writes.
+    """
+
+    def __init__(self, path="usage.db", batch_size=50, flush_interval=30):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []  # every thread's connection, so close() can reach them all
+        self.pending_intervals = []
+        self.pending_hourly = {}
+        self.last_flush = time.monotonic()
+
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Only this thread uses it, but close() may run on another
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def _category_id(self, conn, name):
+        conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (name,))
+        return conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0]
+
+    def _app_id(self, conn, name, category):
+        row = conn.execute("SELECT id FROM apps WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        cursor = conn.execute("INSERT INTO apps (name, category_id) VALUES (?, ?)",
+                              (name, self._category_id(conn, category)))
+        return cursor.lastrowid
+
+    def record_interval(self, app_name, category, start, end):
+        """Queue a raw (app, start, end) interval in epoch seconds"""
+        with self.lock:
+            self.pending_intervals.append((app_name, category, start, end))
+        self.maybe_flush()
+
+    def add_hourly(self, date_str, hour, app_name, category, seconds):
+        """Queue seconds for one hourly bucket, coalescing repeats before the flush"""
+        with self.lock:
+            key = (date_str, hour, app_name)
+            previous = self.pending_hourly.get(key)
+            self.pending_hourly[key] = (category, seconds + (previous[1] if previous else 0.0))
+
+    def maybe_flush(self):
+        with self.lock:
+            due = (len(self.pending_intervals) >= self.batch_size or
+                   time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Commit everything queued in one transaction"""
+        with self.lock:
+            intervals, self.pending_intervals = self.pending_intervals, []
+            hourly, self.pending_hourly = self.pending_hourly, {}
+            self.last_flush = time.monotonic()
+        if not intervals and not hourly:
+            return
+
+        conn = self.connection()
+        with conn:
+            app_ids = {}
+            for app_name, category, start, end in intervals:
+                app_id = app_ids.get(app_name) or self._app_id(conn, app_name, category)
+                app_ids[app_name] = app_id
+                conn.execute("INSERT INTO intervals (app_id, start, end) VALUES (?, ?, ?)",
+                             (app_id, start, end))
+                conn.execute("UPDATE apps SET total_time = total_time + ? WHERE id = ?",
+                             (end - start, app_id))
+
+            rows = []
+            for (date_str, hour, app_name), (category, seconds) in hourly.items():
+                app_id = app_ids.get(app_name) or self._app_id(conn, app_name, category)
+                app_ids[app_name] = app_id
+                rows.append((date_str, hour, app_id, self._category_id(conn, category), seconds))
+            conn.executemany(
+                "INSERT INTO hourly (date, hour, app_id, category_id, seconds) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (date, hour, app_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+                rows)
+
+    def save_apps(self, app_data, category_data):
+        """Write app metadata (app_usage.json layout) and category totals; app totals come from the intervals"""
+        self.flush()
+        conn = self.connection()
+        with conn:
+            for name, total in category_data.items():
+                category_id = self._category_id(conn, name)
+                conn.execute("UPDATE categories SET total_time = ? WHERE id = ?", (total, category_id))
+            for name, info in app_data.items():
+                category = info.get('category') or 'Uncategorized'
+                app_id = self._app_id(conn, name, category)
+                category_id = self._category_id(conn, category)
+                previous = conn.execute("SELECT category_id FROM apps WHERE id = ?", (app_id,)).fetchone()[0]
+                conn.execute("UPDATE apps SET category_id = ?, exe_path = ?, icon_path = ? WHERE id = ?",
+                             (category_id, info.get('exe_path'), info.get('icon_path'), app_id))
+                if previous != category_id:
+                    # Recategorized: move the app's history so category queries stay indexed
+                    conn.execute("UPDATE hourly SET category_id = ? WHERE app_id = ?", (category_id, app_id))
+            names = list(category_data)
+            conn.execute(f"DELETE FROM categories WHERE name NOT IN ({','.join('?' * len(names))}) "
+                         "AND id NOT IN (SELECT category_id FROM apps)", names)
+
+    def load_apps(self):
+        """App records in the app_usage.json layout, plus category totals"""
+        conn = self.connection()
+        apps = {}
+        for name, total_time, category, exe_path, icon_path in conn.execute(
+                "SELECT apps.name, apps.total_time, categories.name, exe_path, icon_path "
+                "FROM apps JOIN categories ON categories.id = apps.category_id"):
+            apps[name] = {'total_time': total_time, 'category': category,
+                          'exe_path': exe_path, 'icon_path': icon_path}
+        categories = dict(conn.execute("SELECT name, total_time FROM categories"))
+        return apps, categories
+
+    def iter_day(self, date_str):
+        """Yield (hour, app_name, seconds) for one day"""
+        conn = self.connection()
+        yield from conn.execute(
+            "SELECT hour, apps.name, seconds FROM hourly JOIN apps ON apps.id = hourly.app_id "
+            "WHERE date = ?", (date_str,))
+
+    def iter_hourly(self, start_date, end_date, batch=1000):
+        """Yield (date, hour, app, category, seconds) between two ISO dates, in batches"""
+        cursor = self.connection().execute(
+            "SELECT date, hour, apps.name, categories.name, seconds FROM hourly "
+            "JOIN apps ON apps.id = hourly.app_id "
+            "JOIN categories ON categories.id = hourly.category_id "
+            "WHERE date BETWEEN ? AND ? ORDER BY date, hour, apps.name", (start_date, end_date))
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            yield from rows
+
+    def app_totals(self, start_date, end_date):
+        """Seconds per app between two ISO dates, inclusive"""
+        conn = self.connection()
+        return dict(conn.execute(
+            "SELECT apps.name, SUM(seconds) FROM hourly JOIN apps ON apps.id = hourly.app_id "
+            "WHERE date BETWEEN ? AND ? GROUP BY hourly.app_id", (start_date, end_date)))
+
+    def category_totals(self, start_date, end_date):
+        """Seconds per category between two ISO dates, inclusive"""
+        conn = self.connection()
+        return dict(conn.execute(
+            "SELECT categories.name, SUM(seconds) FROM hourly "
+            "JOIN categories ON categories.id = hourly.category_id "
+            "WHERE date BETWEEN ? AND ? GROUP BY hourly.category_id", (start_date, end_date)))
+
+    def grouped_totals(self, start_date, end_date, group_by):
+        """{key tuple: seconds} between two ISO dates, grouped by app/category/hour/weekday/date"""
+        columns = {
+            'app': "apps.name",
+            'category': "categories.name",
+            'hour': "hour",
+            'date': "date",
+            'weekday': "(CAST(strftime('%w', date) AS INTEGER) + 6) % 7"  # Monday = 0
+        }
+        selected = ", ".join(columns[key] for key in group_by)
+        positions = ", ".join(str(i + 1) for i in range(len(group_by)))
+        conn = self.connection()
+        return {row[:-1]: row[-1] for row in conn.execute(
+            f"SELECT {selected}, SUM(seconds) FROM hourly "
+            "JOIN apps ON apps.id = hourly.app_id "
+            "JOIN categories ON categories.id = hourly.category_id "
+            f"WHERE date BETWEEN ? AND ? GROUP BY {positions}", (start_date, end_date))}
+
+    def hours_by_category(self, date_str):
+        """24 dicts of category -> seconds for one day"""
+        conn = self.connection()
+        hours = [{} for _ in range(24)]
+        for hour, category, seconds in conn.execute(
+                "SELECT hour, categories.name, SUM(seconds) FROM hourly "
+                "JOIN categories ON categories.id = hourly.category_id "
+                "WHERE date = ? GROUP BY hour, hourly.category_id", (date_str,)):
+            hours[hour][category] = seconds
+        return hours
+
+    def is_empty(self):
+        return self.connection().execute("SELECT COUNT(*) FROM apps").fetchone()[0] == 0
+
+    def migrate_from_json(self, app_usage_path="app_usage.json", hourly_path="hourly_usage.json",
+                          journal_path="usage_journal.jsonl"):
+        """One-shot import of the JSON snapshots into an empty database.
+
+        Journal records newer than a snapshot were never folded into it, so
+        they are added on top: to the app and category totals past the
+        app_usage.json sequence, and to each hourly file past its own.
+        """
+        app_data, category_data = {}, {}
+        app_seq = 0
+        if os.path.exists(app_usage_path):
+            with open(app_usage_path, "r") as f:
+                data = json.load(f)
+                app_data = data.get('app_data', {})
+                category_data = data.get('category_data', {})
+                app_seq = data.get('journal_seq', 0)
+        journal = list(UsageJournal(journal_path).replay()) if os.path.exists(journal_path) else []
+
+        def category_of(name):
+            return app_data.get(name, {}).get('category') or 'Uncategorized'
+
+        conn = self.connection()
+        with conn:
+            for name, total in category_data.items():
+                conn.execute("INSERT OR IGNORE INTO categories (name, total_time) VALUES (?, ?)", (name, total))
+            for name, info in app_data.items():
+                category = info.get('category') or 'Uncategorized'
+                app_id = self._app_id(conn, name, category)
+                conn.execute("UPDATE apps SET total_time = ?, exe_path = ?, icon_path = ? WHERE id = ?",
+                             (info.get('total_time', 0.0), info.get('exe_path'), info.get('icon_path'), app_id))
+
+            # Either the single hourly_usage.json or a directory of monthly partitions
+            partitioned = os.path.isdir(hourly_path)
+            if partitioned:
+                hourly_files = [os.path.join(hourly_path, name) for name in sorted(os.listdir(hourly_path))
+                                if name.endswith(".json") and name != "manifest.json"]
+            else:
+                hourly_files = [hourly_path] if os.path.exists(hourly_path) else []
+
+            file_seqs = {}  # month, or None for the single file -> journal seq it contains
+            for path in hourly_files:
+                with open(path, "r") as f:
+                    hourly = json.load(f)
+                month = os.path.basename(path)[:-5] if partitioned else None
+                file_seqs[month] = hourly.pop('_journal_seq', 0)
+                rows = []
+                for date_str, hours in hourly.items():
+                    for hour_str, apps in hours.items():
+                        for name, seconds in apps.items():
+                            category = category_of(name)
+                            app_id = self._app_id(conn, name, category)
+                            rows.append((date_str, int(hour_str.split(':')[0]), app_id,
+                                         self._category_id(conn, category), seconds))
+                conn.executemany(
+                    "INSERT INTO hourly (date, hour, app_id, category_id, seconds) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (date, hour, app_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    rows)
+
+            # Sessions that were journaled but not yet in the snapshots
+            rows = []
+            for record in journal:
+                name, start, end = record['app'], record['start'], record['end']
+                category = category_of(name)
+                app_id = self._app_id(conn, name, category)
+                category_id = self._category_id(conn, category)
+                if record['seq'] > app_seq:
+                    conn.execute("INSERT INTO intervals (app_id, start, end) VALUES (?, ?, ?)", (app_id, start, end))
+                    conn.execute("UPDATE apps SET total_time = total_time + ? WHERE id = ?", (end - start, app_id))
+                    conn.execute("UPDATE categories SET total_time = total_time + ? WHERE id = ?",
+                                 (end - start, category_id))
+                for date_str, hour, seconds in split_interval(start, end):
+                    if record['seq'] > file_seqs.get(date_str[:7] if partitioned else None, 0):
+                        rows.append((date_str, hour, app_id, category_id, seconds))
+            conn.executemany(
+                "INSERT INTO hourly (date, hour, app_id, category_id, seconds) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (date, hour, app_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+                rows)
+
+    def close(self):
+        """Flush, then close every thread's connection so the WAL is checkpointed and released"""
+        self.flush()
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local.conn = None
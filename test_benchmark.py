@@ -0,0 +1,21 @@
+import unittest
+
+from benchmark import switch_stream
+
+
+class SwitchStreamTest(unittest.TestCase):
+
+    def test_single_app_covers_the_working_day(self):
+        intervals = list(switch_stream({'only.exe': 1.0}, days=2, switches_per_hour=30))
+        self.assertTrue(intervals)
+        self.assertEqual({app_name for app_name, _, _ in intervals}, {'only.exe'})
+        self.assertAlmostEqual(sum(end - start for _, start, end in intervals), 2 * 9 * 3600)
+
+    def test_consecutive_intervals_switch_apps(self):
+        intervals = list(switch_stream({'a.exe': 1.0, 'b.exe': 3.0}, days=1, switches_per_hour=30))
+        for previous, following in zip(intervals, intervals[1:]):
+            self.assertNotEqual(previous[0], following[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,289 @@
+import os
+import json
+from datetime import timedelta
+from contextlib import nullcontext
+
+from persistence import atomic_write_json
+from query import as_date
+
+OTHER = "(other)"
+UNTITLED = "(untitled)"
+MAX_TITLE_CHARS = 200
+# Rough in-memory cost of one counter plus its share of the dicts holding it
+COUNTER_BYTES = 120
+
+
+class TitleDictionary:
+    """Interns window titles as small integer ids, shared by every sketch.
+
+    Ids are reference counted; when no sketch holds a title any more its id
+    is recycled, so the dictionary never outgrows the counters using it.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.titles = []
+        self.refs = []
+        self.free = []
+        self.chars = 0
+
+    def acquire(self, title):
+        title_id = self.ids.get(title)
+        if title_id is None:
+            if self.free:
+                title_id = self.free.pop()
+                self.titles[title_id] = title
+                self.refs[title_id] = 0
+            else:
+                title_id = len(self.titles)
+                self.titles.append(title)
+                self.refs.append(0)
+            self.ids[title] = title_id
+            self.chars += len(title)
+        self.refs[title_id] += 1
+        return title_id
+
+    def release(self, title_id):
+        self.refs[title_id] -= 1
+        if self.refs[title_id] == 0:
+            title = self.titles[title_id]
+            del self.ids[title]
+            self.titles[title_id] = None
+            self.chars -= len(title)
+            self.free.append(title_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SpaceSaving:
+    """Weighted Space-Saving sketch over title ids, keeping at most k counters.
+
+    A title not yet counted takes over the smallest counter when the sketch
+    is full and inherits its count as error, so count - error is a
+    guaranteed lower bound and titles that were never displaced are exact.
+    total covers everything added; what the kept titles can't vouch for is
+    reported as the "other" bucket.
+    """
+    __slots__ = ('k', 'counters', 'total')
+
+    def __init__(self, k):
+        self.k = k
+        self.counters = {}  # title id -> [count, error]
+        self.total = 0.0
+
+    def add(self, title_id, seconds):
+        """Count seconds for title_id; returns the id it displaced, if any"""
+        self.total += seconds
+        counter = self.counters.get(title_id)
+        if counter is not None:
+            counter[0] += seconds
+            return None
+        if len(self.counters) < self.k:
+            self.counters[title_id] = [seconds, 0.0]
+            return None
+        evicted = min(self.counters, key=lambda key: self.counters[key][0])
+        floor = self.counters.pop(evicted)[0]
+        self.counters[title_id] = [floor + seconds, floor]
+        return evicted
+
+    def trim(self, k):
+        """Shrink to the k largest counters; returns the ids dropped"""
+        self.k = k
+        if len(self.counters) <= k:
+            return []
+        ranked = sorted(self.counters, key=lambda key: self.counters[key][0], reverse=True)
+        for title_id in ranked[k:]:
+            del self.counters[title_id]
+        return ranked[k:]
+
+    def items(self):
+        """(title id, guaranteed seconds) from largest, and the seconds left for "other" """
+        kept = sorted(((title_id, count - error) for title_id, (count, error) in self.counters.items()),
+                      key=lambda item: item[1], reverse=True)
+        return kept, max(0.0, self.total - sum(seconds for _, seconds in kept))
+
+
+def top_with_other(titles, k):
+    """Cut a {title: seconds} dict to its k largest titles, folding the rest into OTHER"""
+    other = titles.pop(OTHER, 0.0)
+    ranked = sorted(titles.items(), key=lambda item: (-item[1], item[0]))
+    other += sum(seconds for _, seconds in ranked[k:])
+    kept = dict(ranked[:k])
+    if other > 0:
+        kept[OTHER] = other
+    return kept
+
+
+class TitleLog:
+    """Optional per-title breakdown of time, per app and hour, in bounded memory.
+
+    Each (date, hour, app) gets a SpaceSaving sketch of at most k titles over
+    a shared TitleDictionary; everything beyond the top k ends up in
+    "(other)", so neither memory nor the files grow with the number of
+    distinct titles. Only the current hour is normally held in memory:
+    snapshot() hands every older bucket to the writer thread, which merges
+    it into titles/YYYY-MM-DD.json and cuts each bucket back to k titles
+    there. If the live counters would outgrow memory_budget bytes, every
+    sketch is halved until the next snapshot.
+    """
+
+    def __init__(self, directory="titles", k=10, memory_budget=1 << 20):
+        self.directory = directory
+        self.k = k
+        self.memory_budget = memory_budget
+        self.dictionary = TitleDictionary()
+        self.sketches = {}  # (date, hour, app) -> SpaceSaving
+        self.unwritten = {}
+        self.current_k = k
+        self.counters = 0
+        self.shrinks = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def day_path(self, date_str):
+        return os.path.join(self.directory, f"{date_str}.json")
+
+    def add(self, date_str, hour, app_name, title, seconds):
+        title = (title or UNTITLED).strip()[:MAX_TITLE_CHARS] or UNTITLED
+        key = (date_str, hour, app_name)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = SpaceSaving(self.current_k)
+
+        title_id = self.dictionary.acquire(title)
+        before = len(sketch.counters)
+        evicted = sketch.add(title_id, seconds)
+        if evicted is not None:
+            self.dictionary.release(evicted)
+        elif len(sketch.counters) == before:
+            # Already counted; the sketch holds one reference per title
+            self.dictionary.release(title_id)
+        else:
+            self.counters += 1
+
+        if self.memory_bytes() > self.memory_budget and self.current_k > 1:
+            self.shrink()
+
+    def memory_bytes(self):
+        return self.counters * COUNTER_BYTES + self.dictionary.chars
+
+    def shrink(self):
+        """Halve every live sketch to get back under the memory budget"""
+        self.current_k = max(1, self.current_k // 2)
+        self.shrinks += 1
+        for sketch in self.sketches.values():
+            for title_id in sketch.trim(self.current_k):
+                self.dictionary.release(title_id)
+                self.counters -= 1
+
+    def decode(self, sketch):
+        """{title: seconds} for one sketch, with OTHER for the remainder"""
+        kept, other = sketch.items()
+        titles = {self.dictionary.titles[title_id]: seconds for title_id, seconds in kept}
+        if other > 0:
+            titles[OTHER] = other
+        return titles
+
+    def snapshot(self, current=None, everything=False):
+        """Buckets outside the current (date, hour), removed from memory; call with the data lock held"""
+        days = self.unwritten
+        self.unwritten = {}
+        for key in sorted(self.sketches):
+            if not everything and key[:2] == current:
+                continue
+            sketch = self.sketches.pop(key)
+            date_str, hour, app_name = key
+            bucket = days.setdefault(date_str, {}).setdefault(f"{hour:02d}:00", {}).setdefault(app_name, {})
+            for title, seconds in self.decode(sketch).items():
+                bucket[title] = bucket.get(title, 0.0) + seconds
+            for title_id in sketch.counters:
+                self.dictionary.release(title_id)
+                self.counters -= 1
+        if not self.sketches:
+            self.current_k = self.k
+        return days
+
+    def read_day(self, date_str):
+        """{"HH:00": {app: {title: seconds}}} saved for one day"""
+        path = self.day_path(date_str)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        titles = data['titles']
+        return {hour: {app_name: {titles[title_id] if title_id >= 0 else OTHER: seconds
+                                  for title_id, seconds in entries}
+                       for app_name, entries in apps.items()}
+                for hour, apps in data['hours'].items()}
+
+    def write_day(self, date_str, hours):
+        """Save one day with titles dictionary-encoded: [[title id, seconds], ...], -1 for OTHER"""
+        ids = {}
+        encoded = {}
+        for hour in sorted(hours):
+            encoded[hour] = {}
+            for app_name in sorted(hours[hour]):
+                entries = []
+                for title, seconds in hours[hour][app_name].items():
+                    if title == OTHER:
+                        entries.append([-1, seconds])
+                    else:
+                        entries.append([ids.setdefault(title, len(ids)), seconds])
+                encoded[hour][app_name] = entries
+        return atomic_write_json(self.day_path(date_str), {'titles': list(ids), 'hours': encoded})
+
+    def write(self, days):
+        """Merge snapshot() output into the day files; returns bytes written"""
+        written = 0
+        try:
+            for date_str in sorted(days):
+                hours = self.read_day(date_str)
+                for hour, apps in days[date_str].items():
+                    for app_name, titles in apps.items():
+                        merged = hours.setdefault(hour, {}).setdefault(app_name, {})
+                        for title, seconds in titles.items():
+                            merged[title] = merged.get(title, 0.0) + seconds
+                        hours[hour][app_name] = top_with_other(merged, self.k)
+                written += self.write_day(date_str, hours)
+                days[date_str] = None
+        except Exception:
+            # Handed back to the next snapshot; the writer marks the target dirty again
+            for date_str, hours in days.items():
+                if hours is not None:
+                    self.unwritten[date_str] = hours
+            raise
+        return written
+
+    def breakdown(self, start, end, app_name, top_n=None, lock=None):
+        """[(title, seconds)] for one app between two dates, largest first.
+
+        Day files are read without lock; it is only held while the live
+        sketches are decoded. Without lock, call with the data lock held.
+        """
+        totals = {}
+        day, end = as_date(start), as_date(end)
+        while day <= end:
+            date_str = day.isoformat()
+            for apps in self.read_day(date_str).values():
+                for title, seconds in apps.get(app_name, {}).items():
+                    totals[title] = totals.get(title, 0.0) + seconds
+            day += timedelta(days=1)
+        with lock or nullcontext():
+            live = [self.decode(sketch) for (date_str, _, bucket_app), sketch in self.sketches.items()
+                    if bucket_app == app_name and as_date(start) <= as_date(date_str) <= end]
+        for titles in live:
+            for title, seconds in titles.items():
+                totals[title] = totals.get(title, 0.0) + seconds
+
+        rows = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return rows[:top_n] if top_n is not None else rows
+
+    def stats(self):
+        return {
+            'buckets': len(self.sketches),
+            'counters': self.counters,
+            'titles': len(self.dictionary),
+            'memory_bytes': self.memory_bytes(),
+            'k': self.current_k,
+            'shrinks': self.shrinks
+        }
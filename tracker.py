@@ -0,0 +1,676 @@
+import time
+# Taken before the other imports so startup_stats() counts them
+STARTED = time.perf_counter()
+
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+import probes
+from activity import IdleWatcher, make_default_idle_source
+from journal import UsageJournal
+from persistence import PersistenceWriter, json_target, atomic_write_json
+from process_cache import ProcessInfoCache
+from hourly_store import HourlyStore, PartitionedHourlyStore
+from app_registry import AppRegistry
+from rollups import Rollups
+from query import QueryEngine
+from bucketing import split_interval, bucket_intervals
+from icon_manager import IconManager
+from icon_store import icon_key
+from icon_worker import IconExtractionPool, Win32IconExtractor
+from titles import TitleLog
+from metrics import METRICS
+
+# "json" keeps the journal and JSON snapshots, "sqlite" stores everything in usage.db
+STORAGE_BACKEND = "json"
+
+# Seconds between coalesced saves, and journal size that forces an early one
+FLUSH_INTERVAL = 30
+JOURNAL_MAX_BYTES = 256 * 1024
+
+# Monthly hourly-log partitions kept in memory
+HOURLY_RESIDENT_MONTHS = 3
+
+# Icon extraction threads, and how long to wait on a window that isn't answering
+ICON_WORKERS = 2
+ICON_TIMEOUT_MS = 500
+
+# Seconds without keyboard or mouse input after which time stops being billed to the focused app
+IDLE_THRESHOLD = 300
+
+# Per-window-title breakdowns (off by default): titles kept per app and hour, and the memory their live counters may use
+TRACK_TITLES = False
+TITLE_TOP_K = 10
+TITLE_MEMORY_BUDGET = 1 << 20
+
+# Local socket (named pipe on Windows) answering queries from the GUI, scripts and ipc.py; None picks a per-user default
+IPC_ENABLED = True
+IPC_ADDRESS = None
+
+
+class Tracker:
+    """The tracking core: monitor thread, usage data, categories and persistence.
+
+    Nothing here imports Tk, matplotlib or pystray, so the tracker runs on
+    its own as a background daemon (python tracker.py) and the GUI in
+    main.py is just one client of it; other processes query it through the
+    IpcServer in ipc.py. Clients are told about activity through
+    callbacks called off the caller's thread: every function in
+    switch_listeners gets app_name after each window switch, and
+    on_icon(app_name) runs once an app's real icon has been stored.
+    Everything that touches app_data, category_data, the hourly log or the
+    rollups holds data_lock.
+    """
+
+    def __init__(self, storage_backend=STORAGE_BACKEND, on_switch=None, on_icon=None, track_titles=TRACK_TITLES):
+        self.switch_listeners = [on_switch] if on_switch else []
+        self.on_icon = on_icon
+
+        # Load existing data
+        self.app_data = AppRegistry()
+        self.category_data = defaultdict(float)
+        self.current_app = None
+        self.last_switch_time = datetime.now()
+        self.changed_apps = set()
+        self.idle = False
+        self.current_title = None
+        self.title_since = self.last_switch_time
+
+        # Switches are appended to the journal and folded into the snapshots by the writer thread
+        self.data_lock = threading.RLock()
+        self.journal = UsageJournal("usage_journal.jsonl")
+        self.sqlite = None
+        if storage_backend == "sqlite":
+            from sqlite_store import SqliteStorage
+            self.sqlite = SqliteStorage("usage.db")
+        self.load_data()
+
+        # Initialize icon cache
+        self.cache_dir = "icon_cache"
+        self.icons = IconManager(self.cache_dir)
+        self.default_icon_path = os.path.join(self.cache_dir, "default_icon.png")
+        self.create_default_icon()
+        # Icons saved under the old app name + exe key point at the shared per-exe icon
+        for record in self.app_data:
+            if record.exe_path and self.icons.exists(icon_key(record.exe_path)):
+                record.icon_path = self.icons.path_for(icon_key(record.exe_path))
+        self.icon_pool = IconExtractionPool(Win32IconExtractor(timeout_ms=ICON_TIMEOUT_MS), self.icons.put,
+                                            workers=ICON_WORKERS)
+
+        # Add hourly logging structure; with JSON storage only recent months are kept in memory
+        if self.sqlite is not None:
+            self.hourly_log = HourlyStore()
+        else:
+            self.hourly_log = PartitionedHourlyStore("hourly", max_resident=HOURLY_RESIDENT_MONTHS)
+        self.rollups = Rollups()
+        self.load_hourly_data()
+        self.query_engine = QueryEngine(self.hourly_log, self.rollups, self.app_data.category_of, self.sqlite)
+        self.writer = PersistenceWriter(self.data_lock, FLUSH_INTERVAL,
+                                        checkpoint=lambda: self.journal.last_seq,
+                                        after_flush=self.trim_journal)
+        self.register_save_targets()
+        if self.sqlite is None and (self.hourly_log.dirty or self.rollups.dirty):
+            # Replayed journal records and rebuilt rollup months
+            self.save_hourly_data()
+        self.titles = None
+        if track_titles:
+            self.titles = TitleLog("titles", TITLE_TOP_K, TITLE_MEMORY_BUDGET)
+            self.writer.register('titles', self.snapshot_titles, self.titles.write)
+        self.writer.start()
+
+        self.stop_thread = False
+        self.probe = None
+        self.monitor_thread = None
+        self.idle_watcher = None
+        self.ipc = None
+        self.process_cache = ProcessInfoCache(
+            category_lookup=self.app_data.category_of)
+
+    def start(self, probe=None, ipc=IPC_ENABLED, ipc_address=IPC_ADDRESS, idle_source=None,
+              idle_threshold=IDLE_THRESHOLD):
+        """Start the monitoring thread, fed by foreground-change events, the idle watcher and the query server.
+
+        Without an explicit idle_source, input idle time is only watched
+        when tracking the real desktop; replayed events carry their own clock.
+        """
+        if idle_source is None and probe is None:
+            idle_source = make_default_idle_source()
+        if idle_source is not None:
+            self.idle_watcher = IdleWatcher(idle_source, idle_threshold, self.pause_accounting, self.resume_accounting)
+            self.idle_watcher.start()
+
+        self.probe = probe or probes.make_default_probe(self.titles is not None)
+        self.monitor_thread = threading.Thread(target=self.monitor_active_window)
+        self.monitor_thread.start()
+        if ipc:
+            self.start_ipc(ipc_address)
+        self.register_gauges()
+
+    def start_ipc(self, address=None):
+        """Serve status and range queries on a local socket; tracking carries on if that fails"""
+        from ipc import IpcServer
+        server = IpcServer(self, address)
+        server.start()
+        server.ready.wait()
+        if server.error is None:
+            self.ipc = server
+            self.switch_listeners.append(server.publish_switch)
+
+    def stop(self):
+        """Stop monitoring, flush everything and release the files"""
+        if self.ipc is not None:
+            self.ipc.stop()
+        self.stop_thread = True
+        if self.probe is not None:
+            self.probe.close()
+        if self.monitor_thread is not None and self.monitor_thread.is_alive():
+            self.monitor_thread.join()
+        if self.idle_watcher is not None:
+            self.idle_watcher.stop()
+        self.save_data()
+        self.save_hourly_data()
+        if self.titles is not None:
+            self.writer.mark_dirty('titles')
+        self.icon_pool.stop()
+        self.icons.close()
+        self.writer.stop()
+        self.journal.close()
+        if self.sqlite is not None:
+            self.sqlite.close()
+
+    def register_gauges(self):
+        """Expose queue depths and each component's stats() through METRICS"""
+        METRICS.gauge("monitor.event_queue", lambda: self.probe.queue_depth() if self.probe is not None else 0)
+        METRICS.gauge("process_cache", self.process_cache.stats)
+        METRICS.gauge("icons.cache", self.icons.stats)
+        METRICS.gauge("icons.store", self.icons.store.stats)
+        METRICS.gauge("icons.pool", self.icon_pool.stats)
+        METRICS.gauge("writer", self.writer.stats)
+        METRICS.gauge("journal", lambda: {'last_seq': self.journal.last_seq, 'bytes': self.journal.size_bytes})
+        if isinstance(self.hourly_log, PartitionedHourlyStore):
+            METRICS.gauge("hourly_log", self.hourly_log.stats)
+        if self.ipc is not None:
+            METRICS.gauge("ipc", self.ipc.stats)
+        if self.idle_watcher is not None:
+            METRICS.gauge("activity", self.idle_watcher.stats)
+        if self.titles is not None:
+            METRICS.gauge("titles", self.titles.stats)
+
+    def create_default_icon(self):
+        """Create a default icon if it doesn't exist"""
+        default_key = self.icons.key_for(self.default_icon_path)
+        if not self.icons.exists(default_key):
+            from PIL import Image
+            img = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
+            self.icons.put(default_key, img)
+
+    def get_icon_path(self, hwnd, exe_path, hash_key=None, app_name=None):
+        """Cached icon path for a window; queues extraction and returns the default if missing"""
+        try:
+            if not exe_path:
+                return self.default_icon_path
+
+            # Create unique hash for the executable
+            if hash_key is None:
+                hash_key = icon_key(exe_path)
+            if self.icons.exists(hash_key):
+                return self.icons.path_for(hash_key)
+
+            # Extract on the pool; the row picks up the real icon when it lands
+            self.icon_pool.request(hash_key, hwnd, exe_path,
+                                   lambda key, ok: self.on_icon_ready(app_name, key, ok))
+            return self.default_icon_path
+
+        except Exception as e:
+            print(f"Error getting icon path: {e}")
+            return self.default_icon_path
+
+    def on_icon_ready(self, app_name, key, ok):
+        """Worker callback: point the app at its freshly stored icon"""
+        if not ok or app_name is None:
+            return
+        with self.data_lock:
+            self.app_data.ensure(app_name).icon_path = self.icons.path_for(key)
+        self.writer.mark_dirty('apps')
+        if self.on_icon:
+            self.on_icon(app_name)
+
+    def cache_application_icon(self, hwnd, app_name, exe_path):
+        """Capture and cache application icon"""
+        # Same per-executable key as the monitor, so an icon is only ever stored once
+        return self.get_icon_path(hwnd, exe_path, app_name=app_name)
+
+    def log_hourly_usage(self, app_name, start_time, end_time):
+        """Log time spent in application across hourly intervals"""
+        self.log_hourly_interval(app_name, start_time.timestamp(), end_time.timestamp())
+
+    def log_hourly_interval(self, app_name, start, end):
+        """Log an interval given in epoch seconds"""
+        category = self.app_data.category_of(app_name)
+        for date_str, hour, duration in split_interval(start, end):
+            self.record_hourly(date_str, hour, app_name, category, duration)
+
+    def record_hourly(self, date_str, hour, app_name, category, duration):
+        """Add one hourly bucket to the store, the rollups and the database"""
+        self.hourly_log.add(date_str, hour, app_name, duration)
+        self.rollups.record(date_str, hour, app_name, category, duration)
+        if self.sqlite is not None:
+            self.sqlite.add_hourly(date_str, hour, app_name, category, duration)
+
+    def save_hourly_data(self):
+        """Queue the hourly data and rollups for the writer thread"""
+        self.writer.mark_dirty('hourly')
+
+    def snapshot_hourly_data(self):
+        """Changed hourly partitions and rollup months; called with data_lock held"""
+        partitions = self.hourly_log.snapshot(self.journal.last_seq)
+        # Each rollup month carries the sequence of the hourly partition it was summed from
+        return self.rollups.snapshot(lambda month: self.hourly_log.seqs.get(month, 0)), partitions
+
+    def write_hourly_data(self, snapshot):
+        """Write rollup months, then hourly partitions, then the manifest; returns bytes written.
+
+        A rollup month is never older than its partition file, so after a
+        crash load_rollups() can tell a stale month from its sequence.
+        """
+        months, partitions = snapshot
+        written = 0
+        try:
+            for month, data in months.items():
+                written += atomic_write_json(self.rollup_path(month), data)
+            return written + self.hourly_log.write(partitions)
+        except Exception:
+            self.rollups.dirty.update(months)
+            raise
+
+    def rollup_path(self, month):
+        return os.path.join("rollups", f"{month}.json")
+
+    def load_hourly_data(self):
+        """Load hourly data from JSON file and replay newer journal records"""
+        if self.sqlite is not None:
+            # Only today is kept in memory; reports query the database
+            today = datetime.now().strftime("%Y-%m-%d")
+            for hour, app_name, seconds in self.sqlite.iter_day(today):
+                self.hourly_log.add(today, hour, app_name, seconds)
+            self.rollups.rebuild(self.hourly_log, self.app_data.category_of)
+            self.rollups.load_hours(self.hourly_log, today, self.app_data.category_of)
+            return
+
+        if os.path.exists("hourly_usage.json") and not os.path.exists(self.hourly_log.manifest_path):
+            self.migrate_hourly_json("hourly_usage.json")
+
+        self.load_rollups()
+
+        # Each partition knows which journal records it already contains. The
+        # partitions the journal touches are loaded first, since after a crash
+        # their files can be newer than the manifest. Records between the same
+        # two partition sequences are then wanted by the same partitions, so
+        # each such batch is bucketed in one go
+        records = list(self.journal.replay())
+        months = {month for record in records for month in months_spanned(record['start'], record['end'])}
+        bounds = sorted({self.hourly_log.journal_seq(f"{month}-01") for month in months})
+        batches = defaultdict(list)
+        for record in records:
+            batches[bisect_left(bounds, record['seq'])].append(record)
+        for batch in batches.values():
+            seq = batch[0]['seq']
+            buckets = bucket_intervals((record['app'], record['start'], record['end']) for record in batch)
+            for (date_str, hour, app_name), duration in buckets.items():
+                if seq > self.hourly_log.journal_seq(date_str):
+                    self.record_hourly(date_str, hour, app_name, self.app_data.category_of(app_name), duration)
+
+    def migrate_hourly_json(self, path):
+        """Split the old single-file hourly log into monthly partitions"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        journal_seq = data.pop('_journal_seq', 0)
+        self.hourly_log.load_json(data, journal_seq)
+        self.hourly_log.write(self.hourly_log.snapshot(journal_seq))
+        os.replace(path, path + ".bak")
+        print(f"Moved {len(data)} days of hourly data into {self.hourly_log.directory}/")
+
+    def load_rollups(self):
+        """Load the saved rollup months, rebuilding any that don't match their hourly partition"""
+        os.makedirs("rollups", exist_ok=True)
+        for month in sorted(self.hourly_log.partition_dates):
+            data = None
+            if os.path.exists(self.rollup_path(month)):
+                with open(self.rollup_path(month), "r") as f:
+                    data = json.load(f)
+            seq = data.get('_journal_seq') if data is not None else None
+            if seq is not None and seq != self.hourly_log.seqs.get(month, 0):
+                # After a crash the manifest can lag behind the partition file; ask the file
+                self.hourly_log.partition(month)
+            if seq is not None and seq == self.hourly_log.seqs.get(month, 0):
+                self.rollups.load_month(month, data)
+            else:
+                self.rollups.rebuild_month(self.hourly_log, month, self.app_data.category_of)
+                print(f"Rebuilt the {month} rollups from its hourly partition")
+        if os.path.exists("rollups.json"):
+            # Replaced by the monthly files, which are rebuilt from the partitions above
+            os.remove("rollups.json")
+
+        dates = self.hourly_log.dates()
+        if dates:
+            self.rollups.load_hours(self.hourly_log, dates[-1], self.app_data.category_of)
+
+    def register_save_targets(self):
+        """Tell the writer thread how to snapshot and write each piece of state"""
+        if self.sqlite is not None:
+            self.writer.register('apps',
+                                 lambda: (self.app_data.to_json(), dict(self.category_data)),
+                                 lambda data: self.sqlite.save_apps(*data))
+            self.writer.register('hourly', lambda: None, lambda _: self.sqlite.flush())
+            return
+
+        self.writer.register('apps', self.snapshot_app_data, json_target("app_usage.json"))
+        self.writer.register('hourly', self.snapshot_hourly_data, self.write_hourly_data)
+
+    def trim_journal(self, written):
+        """Drop journal records that every snapshot now contains"""
+        if self.sqlite is not None:
+            return
+        if all(name in written for name in ('apps', 'hourly')):
+            self.journal.truncate(min(written['apps'], written['hourly']))
+
+    def monitor_active_window(self):
+        """Consume focus-change events; nothing runs while focus is stable"""
+        while not self.stop_thread:
+            event = self.probe.next_event()
+            if event is None:
+                break
+            with METRICS.time("monitor.tick"):
+                self.handle_focus_event(event)
+
+    def handle_focus_event(self, event):
+        """Close the running interval and start one for the newly focused app"""
+        now = datetime.fromtimestamp(event.timestamp)
+
+        icon_key = None
+        if event.app_name:
+            # Replayed events already carry the app name
+            app_name, exe_path = event.app_name, None
+        else:
+            with METRICS.time("monitor.process_lookup"):
+                info = self.process_cache.lookup(event.pid)
+            if info is not None:
+                app_name, exe_path, icon_key = info.name, info.exe_path, info.icon_key
+            else:
+                app_name = "Unknown"
+                exe_path = None
+
+        if self.idle and self.idle_watcher is not None:
+            # A switch usually means the user is back; don't wait for the next idle poll
+            self.idle_watcher.check()
+
+        if app_name == self.current_app:
+            if self.titles is not None and event.title != self.current_title:
+                # Same app, another tab or document
+                with self.data_lock:
+                    self.log_title(now)
+                    self.current_title = event.title
+                    self.title_since = now
+                self.writer.mark_dirty('titles')
+            return
+
+        print(f"Window switched to: {app_name}")
+        METRICS.incr("monitor.switches")
+        with METRICS.time("monitor.icon_fetch"):
+            icon_path = self.get_icon_path(event.hwnd, exe_path, icon_key, app_name)
+
+        with self.data_lock:
+            # Nothing has been running while idle, so there is no interval to close
+            if self.current_app is not None and not self.idle:
+                self.close_interval(now)
+                self.log_title(now)
+
+            # Let the Real-time view redraw just these rows
+            self.changed_apps.add(self.current_app)
+            self.changed_apps.add(app_name)
+
+            # Update current app info
+            self.current_app = app_name
+            record = self.app_data.ensure(app_name)
+            record.exe_path = exe_path
+            # The pool may already have stored the real icon for a brand-new app
+            if icon_path != self.default_icon_path or not record.icon_path:
+                record.icon_path = icon_path
+            self.last_switch_time = now
+            self.current_title = event.title
+            self.title_since = now
+
+        self.writer.mark_dirty('apps', 'hourly')
+        if self.titles is not None:
+            self.writer.mark_dirty('titles')
+        if self.journal.size_bytes >= JOURNAL_MAX_BYTES:
+            self.writer.request_flush()
+        for listener in self.switch_listeners:
+            listener(app_name)
+
+    def close_interval(self, end_time):
+        """Bill the current app from the last switch to end_time; called with data_lock held"""
+        # Calculate and log time spent
+        self.apply_interval(self.current_app, self.last_switch_time, end_time)
+
+        # One small append instead of rewriting the snapshots
+        if self.sqlite is not None:
+            self.sqlite.record_interval(self.current_app, self.app_data.category_of(self.current_app),
+                                        self.last_switch_time.timestamp(), end_time.timestamp())
+        else:
+            self.journal.append(self.current_app,
+                                self.last_switch_time.timestamp(),
+                                end_time.timestamp())
+
+    def pause_accounting(self, since):
+        """Idle watcher callback: bill the current app only up to the last input at since"""
+        with self.data_lock:
+            if self.current_app is not None and not self.idle:
+                # Focus may have changed on its own after the last input
+                self.close_interval(max(datetime.fromtimestamp(since), self.last_switch_time))
+                self.log_title(datetime.fromtimestamp(since))
+                self.changed_apps.add(self.current_app)
+            self.idle = True
+        self.writer.mark_dirty('apps', 'hourly')
+        print(f"Idle since {datetime.fromtimestamp(since):%H:%M:%S}, accounting paused")
+
+    def resume_accounting(self, at):
+        """Idle watcher callback: input came back at at, start billing the focused app again"""
+        with self.data_lock:
+            self.idle = False
+            self.last_switch_time = max(datetime.fromtimestamp(at), self.last_switch_time)
+            self.title_since = max(self.last_switch_time, self.title_since)
+        print(f"Active again at {datetime.fromtimestamp(at):%H:%M:%S}")
+
+    def log_title(self, end_time):
+        """Add the running title's time up to end_time to the title log; called with data_lock held"""
+        if self.titles is None or self.current_app is None or self.idle or end_time <= self.title_since:
+            return
+        for date_str, hour, duration in split_interval(self.title_since.timestamp(), end_time.timestamp()):
+            self.titles.add(date_str, hour, self.current_app, self.current_title, duration)
+
+    def snapshot_titles(self):
+        """Finished hours of the title log, or all of it when stopping; called with data_lock held"""
+        now = datetime.now()
+        return self.titles.snapshot((now.strftime("%Y-%m-%d"), now.hour), everything=self.stop_thread)
+
+    def apply_interval(self, app_name, start_time, end_time):
+        """Add one usage interval to the app, category and hourly totals"""
+        time_spent = (end_time - start_time).total_seconds()
+        record = self.app_data.ensure(app_name)
+        record.total_time += time_spent
+
+        # Update category time
+        self.category_data[record.category] += time_spent
+
+        # Log to hourly data
+        self.log_hourly_usage(app_name, start_time, end_time)
+
+    def current_session(self):
+        """(current app, seconds since the switch to it or the end of idle); called with data_lock held"""
+        if not self.current_app:
+            return None, 0.0
+        if self.idle:
+            return self.current_app, 0.0
+        return self.current_app, (datetime.now() - self.last_switch_time).total_seconds()
+
+    def take_changed_apps(self):
+        """Apps whose totals moved since the last call; called with data_lock held"""
+        changed, self.changed_apps = self.changed_apps, set()
+        return changed
+
+    def add_category(self, category):
+        """Create an empty category; False if it already exists"""
+        with self.data_lock:
+            if category in self.category_data:
+                return False
+            self.category_data[category] = 0.0
+        self.save_data()
+        return True
+
+    def assign_category(self, app_name, category):
+        """Move an app and its tracked time to another category"""
+        with self.data_lock:
+            record = self.app_data[app_name]
+            old_category = record.category
+
+            # Update category time totals
+            self.category_data[old_category] -= record.total_time
+            self.category_data[category] += record.total_time
+
+            self.app_data.set_category(app_name, category)
+            self.process_cache.set_category(app_name, category)
+            self.rollups.recategorize(app_name, old_category, category, self.hourly_log)
+        self.writer.mark_dirty('apps', 'hourly')
+
+    def rename_category(self, old_name, new_name):
+        """Rename a category everywhere it is recorded"""
+        with self.data_lock:
+            # Update category data
+            self.category_data[new_name] = self.category_data.pop(old_name)
+
+            # Update app data
+            self.app_data.rename_category(old_name, new_name)
+            self.process_cache.rename_category(old_name, new_name)
+            self.rollups.rename_category(old_name, new_name)
+        self.writer.mark_dirty('apps', 'hourly')
+
+    def delete_category(self, category):
+        """Remove a category, moving its apps and their time to Uncategorized"""
+        with self.data_lock:
+            # Reassign apps
+            self.app_data.rename_category(category, "Uncategorized")
+            self.process_cache.rename_category(category, "Uncategorized")
+            self.rollups.rename_category(category, "Uncategorized")
+
+            # Remove category, moving its time along with its apps
+            self.category_data["Uncategorized"] += self.category_data.pop(category)
+        self.writer.mark_dirty('apps', 'hourly')
+
+    def save_data(self):
+        """Queue the tracking data for the writer thread"""
+        self.writer.mark_dirty('apps')
+
+    def snapshot_app_data(self):
+        """Tracking data in the app_usage.json layout; called with data_lock held"""
+        return {
+            'app_data': self.app_data.to_json(),
+            'category_data': dict(self.category_data),
+            'journal_seq': self.journal.last_seq
+        }
+
+    def load_data(self):
+        """Load tracking data from JSON file and replay newer journal records"""
+        if self.sqlite is not None:
+            if self.sqlite.is_empty():
+                hourly_path = "hourly" if os.path.isdir("hourly") else "hourly_usage.json"
+                self.sqlite.migrate_from_json("app_usage.json", hourly_path)
+            app_data, category_data = self.sqlite.load_apps()
+            self.app_data.load_json(app_data)
+            self.category_data.update(category_data)
+            return
+
+        journal_seq = 0
+        try:
+            with open("app_usage.json", "r") as f:
+                data = json.load(f)
+                self.app_data.load_json(data.get('app_data', {}))
+                self.category_data.update(data.get('category_data', {}))
+                journal_seq = data.get('journal_seq', 0)
+        except FileNotFoundError:
+            pass
+
+        for record in self.journal.replay(after_seq=journal_seq):
+            time_spent = record['end'] - record['start']
+            app_record = self.app_data.ensure(record['app'])
+            app_record.total_time += time_spent
+            self.category_data[app_record.category] += time_spent
+
+
+def months_spanned(start, end):
+    """"YYYY-MM" of every local month an interval in epoch seconds touches"""
+    month = datetime.fromtimestamp(start).date().replace(day=1)
+    last = datetime.fromtimestamp(end).date().replace(day=1)
+    while month <= last:
+        yield month.strftime("%Y-%m")
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def startup_stats():
+    """Wall time since this module was loaded, CPU time since the interpreter started, and memory"""
+    import psutil
+    return {
+        'seconds': time.perf_counter() - STARTED,
+        'cpu_seconds': time.process_time(),
+        'rss_bytes': psutil.Process().memory_info().rss,
+        'modules': len(sys.modules),
+        'gui_loaded': any(name in sys.modules for name in ('tkinter', 'matplotlib', 'pystray'))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track application usage in the background, without the GUI")
+    parser.add_argument("--data-dir", help="directory holding the usage files (default: current directory)")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default=STORAGE_BACKEND)
+    parser.add_argument("--replay", help="replay focus events from a JSON-lines file instead of watching windows")
+    parser.add_argument("--startup-stats", metavar="PATH", help="write cold-start time and RSS to PATH as JSON")
+    parser.add_argument("--ipc-address", default=IPC_ADDRESS, help="socket path or pipe name to serve queries on")
+    parser.add_argument("--no-ipc", action="store_true", help="don't serve queries")
+    parser.add_argument("--titles", action="store_true", default=TRACK_TITLES,
+                        help="also break time down by window title")
+    parser.add_argument("--idle-threshold", type=float, default=IDLE_THRESHOLD,
+                        help="seconds without input before accounting pauses")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        os.chdir(args.data_dir)
+
+    tracker = Tracker(args.storage, track_titles=args.titles)
+    tracker.start(probes.ReplayProbe.from_file(args.replay) if args.replay else None,
+                  ipc=IPC_ENABLED and not args.no_ipc, ipc_address=args.ipc_address,
+                  idle_threshold=args.idle_threshold)
+
+    stats = startup_stats()
+    print(f"Tracking started in {stats['seconds'] * 1000:.0f} ms ({stats['cpu_seconds'] * 1000:.0f} ms CPU), "
+          f"RSS {stats['rss_bytes'] / 2 ** 20:.1f} MB")
+    if args.startup_stats:
+        atomic_write_json(args.startup_stats, stats, indent=2)
+
+    # Run until the probe runs dry (replays) or we are told to stop
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    while tracker.monitor_thread.is_alive() and not stopping.wait(0.5):
+        pass
+    tracker.stop()
+
+
+if __name__ == "__main__":
+    main()